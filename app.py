@@ -2,9 +2,10 @@ import os
 import re
 import base64
 import fitz  # PyMuPDF
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, send_from_directory, jsonify, Response
 from werkzeug.utils import secure_filename
-import zipfile
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
 from io import BytesIO
 import json
 from datetime import datetime
@@ -12,8 +13,22 @@ from PIL import Image
 import numpy as np
 import hashlib
 import uuid
-from collections import defaultdict
+import time
+import tempfile
+import math
+from bisect import bisect_right
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from ai_indexing import get_indexer, test_api_connection
+from extraction_jobs import get_job_manager
+from image_staging import ImageStaging, StagedImage
+from boilerplate_index import get_boilerplate_index
+from extraction_cache import get_extraction_cache, compute_file_sha256
+from zip_stream import iter_zip_stream, walk_folder_entries
+from export_artifacts import get_export_artifact_store
+from thumbnail_cache import get_thumbnail_cache, normalize_thumbnail_width, THUMBNAIL_FORMATS
+from page_manifest import (load_page_manifest, save_page_manifest, update_manifest_source, make_image_record,
+                           make_manifest_page, page_scan_from_manifest, ReusablePages)
 
 # Charger les variables d'environnement depuis le fichier .env
 try:
@@ -31,6 +46,38 @@ app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'extracted_images'
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 
+# Nombre de processus pour l'extraction des images (1 = extraction séquentielle)
+app.config['EXTRACTION_WORKERS'] = int(os.environ.get('EXTRACTION_WORKERS', 1))
+# Octets d'images gardés en mémoire pendant l'extraction avant déchargement sur disque
+app.config['EXTRACTION_MEMORY_BUDGET'] = int(os.environ.get('EXTRACTION_MEMORY_BUDGET', 64 * 1024 * 1024))
+# Index persistant des images récurrentes entre documents (logos, tampons)
+app.config['BOILERPLATE_INDEX'] = os.environ.get('BOILERPLATE_INDEX', 'boilerplate_index.json')
+# Nombre de documents dans lesquels une image doit être vue avant d'être ignorée
+app.config['BOILERPLATE_MIN_DOCUMENTS'] = int(os.environ.get('BOILERPLATE_MIN_DOCUMENTS', 2))
+app.config['BOILERPLATE_MAX_ENTRIES'] = int(os.environ.get('BOILERPLATE_MAX_ENTRIES', 1000))
+# Cache des résultats d'extraction (même PDF, mêmes options) avec éviction LRU
+app.config['EXTRACTION_CACHE_FOLDER'] = os.environ.get('EXTRACTION_CACHE_FOLDER', 'extraction_cache')
+app.config['EXTRACTION_CACHE_MAX_ENTRIES'] = int(os.environ.get('EXTRACTION_CACHE_MAX_ENTRIES', 50))
+app.config['EXTRACTION_CACHE_MAX_BYTES'] = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+# Archives d'export déjà construites (même configuration, mêmes images), reprise par Range
+app.config['EXPORT_ARTIFACT_FOLDER'] = os.environ.get('EXPORT_ARTIFACT_FOLDER', 'export_artifacts')
+app.config['EXPORT_ARTIFACT_MAX_BYTES'] = int(os.environ.get('EXPORT_ARTIFACT_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+app.config['EXPORT_ARTIFACT_MAX_AGE'] = int(os.environ.get('EXPORT_ARTIFACT_MAX_AGE', 24 * 3600))
+# Nombre de threads compressant les entrées des archives ZIP (1 = compression séquentielle)
+app.config['EXPORT_COMPRESSION_WORKERS'] = int(os.environ.get('EXPORT_COMPRESSION_WORKERS', min(4, os.cpu_count() or 1)))
+# Cache disque des miniatures et aperçus des images (éviction LRU)
+app.config['THUMBNAIL_CACHE_FOLDER'] = os.environ.get('THUMBNAIL_CACHE_FOLDER', 'thumbnail_cache')
+app.config['THUMBNAIL_CACHE_MAX_BYTES'] = int(os.environ.get('THUMBNAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Pré-filtrage des images d'après leurs métadonnées, avant décodage (puces, espaceurs, masques)
+app.config['IMAGE_MIN_DIMENSION'] = int(os.environ.get('IMAGE_MIN_DIMENSION', 16))
+app.config['IMAGE_MIN_AREA'] = int(os.environ.get('IMAGE_MIN_AREA', 1024))
+app.config['IMAGE_SKIP_MASKS'] = os.environ.get('IMAGE_SKIP_MASKS', 'true').lower() in ('1', 'true', 'yes', 'on')
+# Plafond de résolution des images extraites (0 = pas de plafond) ; l'original reste disponible à la demande
+app.config['IMAGE_MAX_DIMENSION'] = int(os.environ.get('IMAGE_MAX_DIMENSION', 0))
+app.config['IMAGE_MAX_MEGAPIXELS'] = float(os.environ.get('IMAGE_MAX_MEGAPIXELS', 0))
+# Nombre d'extractions exécutées simultanément en arrière-plan (jobs)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+
 # Configuration pour désactiver la mise en cache des fichiers statiques en mode développement
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
@@ -40,137 +87,554 @@ os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Durée de cache navigateur des images demandées avec leur version (?v=), immuables
+IMAGE_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Extraction parallèle : en dessous de ce nombre de pages, le coût du pool dépasse le gain
+PARALLEL_MIN_PAGES = 20
+# Nombre de plages de pages par worker (équilibrage de charge)
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+# Patterns spécialisés pour détecter sections et sous-sections (testés dans cet ordre)
+SECTION_PATTERNS = [
+    # Patterns principaux identifiés dans l'analyse
+    r'^(\d+)\.\s+(.{3,100})$',           # 1. TITRE (pattern principal)
+    r'^(\d+\.\d+)\.\s+(.{3,100})$',      # 1.1. TITRE (sous-sections)
+    r'^(\d+\.\d+\.\d+)\.\s+(.{3,100})$', # 1.1.1. TITRE (sous-sous-sections)
+    
+    # Patterns alternatifs
+    r'^(\d+)\s+(.{3,100})$',             # 1 TITRE (sans point)
+    r'^(\d+\.\d+)\s+(.{3,100})$',        # 1.1 TITRE (sans point final)
+    r'^(\d+\.\d+\.\d+)\s+(.{3,100})$',   # 1.1.1 TITRE (sans point final)
+    
+    # Patterns avec mots-clés
+    r'^SECTION\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
+    r'^CHAPITRE\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
+    r'^PARTIE\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
+]
+# Alternation unique compilée une fois : l'alternative retenue est la première qui
+# correspond, comme en testant les patterns un par un (groupes nommés num0/title0...)
+SECTION_HEADING_PATTERN = re.compile('|'.join(
+    '(?:' + pattern.replace('(', f'(?P<num{i}>', 1).replace('(.{3,100})', f'(?P<title{i}>.{{3,100}})') + ')'
+    for i, pattern in enumerate(SECTION_PATTERNS)
+), re.IGNORECASE)
+# Premiers caractères possibles d'un titre de section hors chiffres (SECTION, CHAPITRE,
+# PARTIE ; 'ſ' correspond à 'S' en mode insensible à la casse)
+SECTION_HEADING_FIRST_CHARS = frozenset('sScCpPſ')
+SECTION_EXCLUDED_PREFIXES = ('page ', 'figure ', 'table ', 'annexe', 'login', 'mot de passe')
+SECTION_TITLE_EXCLUDED_PREFIXES = ('login', 'mot de passe', 'password', 'user')
+DATE_PATTERN = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}')
+SYMBOLS_ONLY_PATTERN = re.compile(r'^[\d\s\.\-\)\(\[\]]+$')
+YEAR_PATTERN = re.compile(r'\d{4}')
+
+# Texte analysé pour les titres : sans les blocs image (lus séparément via get_image_info)
+HEADING_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Signets (outline) du PDF : nombre minimal d'entrées et profondeur prise en compte
+OUTLINE_MIN_ENTRIES = 2
+OUTLINE_MAX_LEVEL = 3
+# Numéro en tête d'un titre de signet ("2.1 Titre", "SECTION 3 : Titre")
+OUTLINE_NUMBER_PATTERN = re.compile(r'^(?:(?:SECTION|CHAPITRE|PARTIE)\s+)?(\d+(?:\.\d+){0,2})\.?\s*[:\-]?\s+(.{3,100})$', re.IGNORECASE)
+
+# Intervalle des commentaires keepalive du flux SSE de progression (secondes)
+SSE_KEEPALIVE_SECONDS = 15
+
+# Hash perceptuel : image réduite à HASH_SIZE x HASH_SIZE pixels, 1 bit par pixel
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+HASH_WORDS = HASH_BITS // 64  # Nombre de uint64 par hash
+# Taille approximative (pixels) à laquelle les images sont réduites avant le calcul du hash
+HASH_DECODE_SIZE = 4 * HASH_SIZE
+# Distance de Hamming maximale entre deux images considérées comme identiques
+SIMILARITY_THRESHOLD = 25
+# Taille à partir de laquelle un compartiment de l'index multi-bandes est compacté
+BAND_COMPACT_SIZE = 256
+
+# Qualité JPEG des images ré-encodées (les JPEG natifs sont copiés sans ré-encodage)
+JPEG_QUALITY = 95
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def detect_sections(pdf_document):
+def get_page_manifest_path(document_name):
+    """Manifeste des empreintes de pages d'un document, à côté de son dossier de sortie"""
+    return os.path.join(app.config['OUTPUT_FOLDER'], f"{document_name}.pages.json")
+
+def get_source_pdf_path(pdf_sha256):
+    """PDF source conservé d'après son empreinte (partagé par les documents de même contenu)"""
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{pdf_sha256}.pdf")
+
+def get_app_extraction_cache():
+    """Cache des résultats d'extraction configuré pour l'application"""
+    return get_extraction_cache(
+        app.config['EXTRACTION_CACHE_FOLDER'],
+        max_entries=app.config['EXTRACTION_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['EXTRACTION_CACHE_MAX_BYTES']
+    )
+
+def get_app_image_filter():
+    """
+    Seuils du pré-filtrage (voir prefilter_image) et plafond de résolution (voir
+    get_downscale_size) des images configurés pour l'application
+    """
+    return {
+        'min_dimension': app.config['IMAGE_MIN_DIMENSION'],
+        'min_area': app.config['IMAGE_MIN_AREA'],
+        'skip_masks': app.config['IMAGE_SKIP_MASKS'],
+        'max_dimension': app.config['IMAGE_MAX_DIMENSION'],
+        'max_megapixels': app.config['IMAGE_MAX_MEGAPIXELS']
+    }
+
+def get_app_export_store():
+    """Stockage des archives d'export configuré pour l'application"""
+    return get_export_artifact_store(
+        app.config['EXPORT_ARTIFACT_FOLDER'],
+        max_bytes=app.config['EXPORT_ARTIFACT_MAX_BYTES'],
+        max_age=app.config['EXPORT_ARTIFACT_MAX_AGE'],
+        workers=app.config['EXPORT_COMPRESSION_WORKERS']
+    )
+
+def get_app_thumbnail_cache():
+    """Cache des miniatures configuré pour l'application"""
+    return get_thumbnail_cache(
+        app.config['THUMBNAIL_CACHE_FOLDER'],
+        max_bytes=app.config['THUMBNAIL_CACHE_MAX_BYTES']
+    )
+
+def get_app_boilerplate_index():
+    """Index des images récurrentes configuré pour l'application"""
+    return get_boilerplate_index(
+        app.config['BOILERPLATE_INDEX'],
+        HASH_BITS,
+        SIMILARITY_THRESHOLD,
+        min_documents=app.config['BOILERPLATE_MIN_DOCUMENTS'],
+        max_entries=app.config['BOILERPLATE_MAX_ENTRIES']
+    )
+
+def match_section_heading(line_text):
+    """
+    Teste si une ligne de texte (déjà nettoyée) est un titre de section numéroté
+    
+    Les lignes qui ne commencent ni par un chiffre ni par un mot-clé possible sont
+    rejetées avant toute expression régulière.
+    
+    Returns:
+        tuple: (numéro, titre, pattern utilisé) ou None si la ligne n'est pas un titre valide
+    """
+    # Critères de base pour qu'une ligne soit candidate
+    if not (3 <= len(line_text) <= 120):  # Longueur raisonnable
+        return None
+    first_char = line_text[0]
+    if not (first_char.isdecimal() or first_char in SECTION_HEADING_FIRST_CHARS):
+        return None
+    if (line_text.isdigit() or  # Pas juste un chiffre
+        DATE_PATTERN.match(line_text) or  # Pas une date
+        line_text.lower().startswith(SECTION_EXCLUDED_PREFIXES)):
+        return None
+    
+    match = SECTION_HEADING_PATTERN.match(line_text)
+    if not match:
+        return None
+    
+    # Le dernier groupe capturé est le titre du premier pattern qui correspond
+    index = int(match.lastgroup[len('title'):])
+    section_number = match.group(f'num{index}')
+    section_title = match.group(match.lastgroup).strip()
+    
+    # Validation supplémentaire du titre
+    if (len(section_title) < 3 or  # Titre suffisamment long
+        SYMBOLS_ONLY_PATTERN.match(section_title) or  # Pas que des chiffres/symboles
+        section_title.lower().startswith(SECTION_TITLE_EXCLUDED_PREFIXES) or
+        len([c for c in section_title if c.isalpha()]) < 3):  # Au moins 3 lettres
+        return None
+    
+    return section_number, section_title, SECTION_PATTERNS[index]
+
+def detect_sections(pdf_document, progress_callback=None, use_outline=True, detection_info=None, page_scans=None, workers=1):
+    """
+    Détecte les sections ET sous-sections du document PDF
+    
+    Les signets (outline) du PDF sont utilisés en priorité : ils donnent directement la
+    hiérarchie sans analyser le texte. L'analyse du texte de chaque page n'est lancée
+    que si le document n'a pas de signets ou si ceux-ci sont incohérents.
+    
+    progress_callback (optionnel) : appelé avec ('sections', pages analysées, total, **compteurs)
+    detection_info (optionnel) : dict complété avec la stratégie utilisée ('outline' ou 'text')
+    et la durée de détection en secondes
+    page_scans (optionnel) : liste complétée avec le scan des pages si le texte est analysé
+    (voir detect_sections_from_text)
+    workers : nombre de processus pour l'analyse du texte (voir scan_pages)
+    """
+    started_at = time.perf_counter()
+    total_pages = len(pdf_document)
+    
+    sections = detect_sections_from_outline(pdf_document) if use_outline else None
+    strategy = 'outline'
+    if sections is None:
+        strategy = 'text'
+        sections = detect_sections_from_text(pdf_document, progress_callback=progress_callback,
+                                             page_scans=page_scans, workers=workers)
+    
+    duration = round(time.perf_counter() - started_at, 3)
+    print(f"⏱️ Sections détectées ({strategy}) en {duration}s")
+    
+    if progress_callback:
+        progress_callback('sections', total_pages, total_pages, sections=len(sections),
+                          strategy=strategy, duration=duration)
+    if detection_info is not None:
+        detection_info.update(strategy=strategy, duration=duration)
+    
+    return sections
+
+def compute_section_end_pages(entries, total_pages):
+    """
+    Calcule la page de fin de chaque section en un seul passage
+    
+    La fin d'une section est la page précédant la prochaine section de niveau égal ou
+    supérieur (moins profonde), ou la dernière page du document ; une section couvre
+    au moins sa page de début. Une pile des sections suivantes, parcourues à rebours,
+    donne cette prochaine section sans reparcourir la liste.
+    
+    Args:
+        entries (list): Sections dans l'ordre du document, avec 'page' et 'level'
+        total_pages (int): Nombre de pages du document
+    
+    Returns:
+        list: Page de fin de chaque section
+    """
+    end_pages = [total_pages] * len(entries)
+    following = []  # Pile (niveau, page) des sections suivantes non masquées
+    
+    for i in range(len(entries) - 1, -1, -1):
+        level, start_page = entries[i]['level'], entries[i]['page']
+        # Les sections suivantes plus profondes ne bornent ni celle-ci ni les précédentes
+        while following and following[-1][0] > level:
+            following.pop()
+        if following:
+            end_pages[i] = max(start_page, following[-1][1] - 1)
+        following.append((level, start_page))
+    
+    return end_pages
+
+def detect_sections_from_outline(pdf_document):
+    """
+    Construit les sections à partir des signets (outline) du PDF
+    
+    Les numéros présents dans les titres des signets sont conservés s'ils sont cohérents
+    avec la hiérarchie ; sinon les sections sont numérotées selon leur position.
+    
+    Returns:
+        list: Sections au même format que l'analyse du texte, ou None si le document
+        n'a pas de signets exploitables
+    """
+    total_pages = len(pdf_document)
+    toc = [entry for entry in pdf_document.get_toc(simple=True) if entry[0] <= OUTLINE_MAX_LEVEL]
+    
+    if len(toc) < OUTLINE_MIN_ENTRIES:
+        return None
+    
+    # Validation : pages existantes, ordre croissant, hiérarchie sans saut de niveau
+    previous_level, previous_page = 0, 1
+    for level, title, page in toc:
+        if not (1 <= page <= total_pages) or page < previous_page or level > previous_level + 1:
+            print(f"⚠️  Signets incohérents ({title!r}, niveau {level}, page {page}), analyse du texte")
+            return None
+        previous_level, previous_page = level, page
+    
+    # Numérotation : celle des titres si elle correspond aux niveaux, sinon par position
+    matches = [OUTLINE_NUMBER_PATTERN.match(title.strip()) for _, title, _ in toc]
+    use_title_numbers = all(
+        match and len(match.group(1).split('.')) == level
+        for match, (level, _, _) in zip(matches, toc)
+    )
+    
+    entries = []
+    counters = []
+    for match, (level, title, page) in zip(matches, toc):
+        counters = counters[:level] + [0] * (level - len(counters))
+        counters[level - 1] += 1
+        if use_title_numbers:
+            number, section_title = match.group(1), match.group(2).strip()
+        else:
+            number, section_title = '.'.join(str(c) for c in counters), title.strip()
+        entries.append({'number': number, 'title': section_title, 'page': page, 'level': level})
+    
+    if len({entry['number'] for entry in entries}) != len(entries):
+        print("⚠️  Numéros de signets en double, analyse du texte")
+        return None
+    
+    sections = []
+    end_pages = compute_section_end_pages(entries, total_pages)
+    for entry, end_page in zip(entries, end_pages):
+        sections.append({
+            'number': entry['number'],
+            'title': f"{entry['number']}. {entry['title']}"[:100],
+            'start_page': entry['page'],
+            'end_page': end_page,
+            'level': entry['level']
+        })
+    
+    print(f"📑 {len(sections)} sections lues depuis les signets du document")
+    return sections
+
+def scan_page(page, page_num, collect_headings=False, stream_digests=None):
+    """
+    Lit une page une seule fois pour toutes les étapes de l'extraction
+    
+    stream_digests (optionnel) : cache {xref: empreinte} des images, partagé entre les pages
+    
+    Returns:
+        dict: 'images' (liste de page.get_images()), 'bboxes' ({xref: [bbox, ...]}),
+        'fingerprint' (empreinte de la page) et 'headings' (titres candidats, None si
+        collect_headings est faux)
+    """
+    image_list = page.get_images()
+    return {
+        'images': image_list,
+        'bboxes': locate_page_images(page, image_list),
+        'fingerprint': compute_page_fingerprint(page, image_list, stream_digests),
+        'headings': collect_heading_candidates(page, page_num) if collect_headings else None
+    }
+
+def compute_page_fingerprint(page, image_list, stream_digests=None):
+    """
+    Empreinte d'une page : flux de contenu, dimensions et flux bruts de ses images
+    
+    Deux pages de même empreinte produisent les mêmes images aux mêmes emplacements
+    (les flux d'images sont lus sans décodage).
+    
+    Returns:
+        str: Empreinte hexadécimale (SHA-256)
+    """
+    pdf_document = page.parent
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(str(tuple(page.rect)).encode())
+    
+    for img in image_list:
+        xref = img[0]
+        stream_digest = stream_digests.get(xref) if stream_digests is not None else None
+        if stream_digest is None:
+            stream_digest = hashlib.sha256(
+                pdf_document.xref_object(xref).encode() + (pdf_document.xref_stream_raw(xref) or b'')
+            ).hexdigest()
+            if stream_digests is not None:
+                stream_digests[xref] = stream_digest
+        digest.update(stream_digest.encode())
+    
+    return digest.hexdigest()
+
+def scan_pages(pdf_document, collect_headings=False, progress_callback=None, workers=1):
+    """
+    Scanne toutes les pages du document (voir scan_page)
+    
+    Si workers > 1, les pages sont réparties par plages entre plusieurs processus
+    (le document doit avoir été ouvert depuis un fichier). Les scans sont fusionnés
+    dans l'ordre des pages : le résultat ne dépend pas du nombre de workers.
+    
+    progress_callback (optionnel) : appelé avec ('sections', pages analysées, total, candidates=n)
+    
+    Returns:
+        list: Scan de chaque page, dans l'ordre des pages
+    """
+    total_pages = len(pdf_document)
+    page_scans = []
+    candidates = 0
+    stream_digests = {}
+    
+    if workers and workers > 1 and total_pages >= PARALLEL_MIN_PAGES and pdf_document.name:
+        page_ranges = split_page_range(total_pages, workers * PARALLEL_CHUNKS_PER_WORKER)
+        print(f"⚡ Analyse parallèle: {total_pages} pages, {len(page_ranges)} plages, {workers} workers")
+        
+        executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(_scan_page_range, pdf_document.name, start, end, collect_headings)
+                for start, end in page_ranges
+            ]
+            # Fusion dans l'ordre des plages (et donc des pages)
+            for future, (start, end) in zip(futures, page_ranges):
+                if progress_callback:
+                    progress_callback('sections', start, total_pages, candidates=candidates)
+                range_scans = future.result()
+                if collect_headings:
+                    candidates += sum(len(scan['headings']) for scan in range_scans)
+                page_scans.extend(range_scans)
+        finally:
+            # En cas d'erreur ou d'annulation, ne pas lancer les plages restantes
+            executor.shutdown(wait=True, cancel_futures=True)
+        return page_scans
+    
+    for page_num in range(total_pages):
+        if progress_callback:
+            progress_callback('sections', page_num, total_pages, candidates=candidates)
+        
+        scan = scan_page(pdf_document[page_num], page_num, collect_headings, stream_digests)
+        if collect_headings:
+            candidates += len(scan['headings'])
+        page_scans.append(scan)
+    
+    return page_scans
+
+def _scan_page_range(pdf_path, start_page, end_page, collect_headings=False):
+    """Worker : ouvre son propre document fitz et scanne les pages [start_page, end_page["""
+    pdf_document = fitz.open(pdf_path)
+    try:
+        stream_digests = {}  # Cache local au worker
+        return [scan_page(pdf_document[page_num], page_num, collect_headings, stream_digests)
+                for page_num in range(start_page, end_page)]
+    finally:
+        pdf_document.close()
+
+def locate_page_images(page, image_list):
+    """
+    Retourne les emplacements (bbox) de chaque image de la page
+    
+    Les emplacements sont lus en une seule passe (page.get_image_info) et associés aux
+    xrefs par dimensions ; seules les images de dimensions ambiguës sur la page sont
+    localisées individuellement.
+    
+    Returns:
+        dict: {xref: [(x0, y0, x1, y1), ...]}
+    """
+    if not image_list:
+        return {}
+    
+    bboxes_by_size = defaultdict(list)
+    for info in page.get_image_info():
+        bboxes_by_size[(info['width'], info['height'])].append(tuple(round(v, 2) for v in info['bbox']))
+    
+    xrefs_by_size = defaultdict(set)
+    for img in image_list:
+        xrefs_by_size[(img[2], img[3])].add(img[0])
+    
+    bboxes = {}
+    for img in image_list:
+        xref, size = img[0], (img[2], img[3])
+        if len(xrefs_by_size[size]) == 1:
+            bboxes[xref] = bboxes_by_size.get(size, [])
+        else:
+            bboxes[xref] = [tuple(round(v, 2) for v in rect) for rect in page.get_image_rects(xref)]
+    return bboxes
+
+def collect_heading_candidates(page, page_num):
+    """
+    Retourne les titres de section candidats d'une page (avec police, gras et score)
+    """
+    potential_sections = []
+    blocks = page.get_text("dict", flags=HEADING_TEXT_FLAGS)
+    
+    for block in blocks["blocks"]:
+        if "lines" in block:
+            for line in block["lines"]:
+                # Reconstituer le texte de la ligne
+                line_text = ""
+                max_font_size = 0
+                is_bold = False
+                total_flags = 0
+                span_count = 0
+                
+                for span in line["spans"]:
+                    line_text += span["text"]
+                    max_font_size = max(max_font_size, span["size"])
+                    total_flags += span["flags"]
+                    span_count += 1
+                    if span["flags"] & 2**4:  # Gras
+                        is_bold = True
+                
+                line_text = line_text.strip()
+                
+                # Critère de police, puis correspondance du texte (rejet rapide avant toute regex)
+                if max_font_size < 10.0:  # Taille de police suffisante (abaissé pour sous-sections)
+                    continue
+                
+                heading = match_section_heading(line_text)
+                if heading is None:
+                    continue
+                
+                section_number, section_title, pattern = heading
+                
+                # Calculer le score de qualité de la section
+                quality_score = 0
+                
+                # Bonus pour taille de police importante
+                if max_font_size >= 16.0:
+                    quality_score += 3
+                elif max_font_size >= 12.0:
+                    quality_score += 2
+                elif max_font_size >= 10.0:
+                    quality_score += 1
+                
+                # Bonus pour gras
+                if is_bold:
+                    quality_score += 2
+                
+                # Bonus pour titre en majuscules (style administratif)
+                if section_title.isupper() and len(section_title) > 5:
+                    quality_score += 1
+                
+                # Bonus pour numérotation (ajustement pour favoriser les sous-sections)
+                dots_count = section_number.count('.')
+                if dots_count == 0:
+                    quality_score += 3  # Section principale
+                elif dots_count == 1:
+                    quality_score += 2  # Sous-section (préservée)
+                elif dots_count == 2:
+                    quality_score += 1  # Sous-sous-section
+                
+                # Bonus spécial pour les sous-sections bien formées
+                if '.' in section_number and max_font_size >= 11.0:
+                    quality_score += 1
+                
+                # Malus pour certains patterns suspects
+                if YEAR_PATTERN.search(section_title):  # Contient une année
+                    quality_score -= 2
+                if len(section_title) > 80:  # Titre trop long
+                    quality_score -= 1
+                
+                # Calculer le niveau hiérarchique
+                if '.' in section_number:
+                    level = len(section_number.split('.'))
+                else:
+                    level = 1
+                
+                potential_sections.append({
+                    'number': section_number,
+                    'title': section_title,
+                    'full_title': f"{section_number}. {section_title}",
+                    'page': page_num + 1,
+                    'font_size': max_font_size,
+                    'is_bold': is_bold,
+                    'level': level,
+                    'quality_score': quality_score,
+                    'pattern_used': pattern
+                })
+    
+    return potential_sections
+
+
+def detect_sections_from_text(pdf_document, progress_callback=None, page_scans=None, workers=1):
     """
     Détecte les sections ET sous-sections numérotées du document PDF
     Algorithme amélioré avec meilleure gestion des sous-sections
+    
+    progress_callback (optionnel) : appelé avec ('sections', pages analysées, total, candidates=n)
+    page_scans (optionnel) : scans des pages (voir scan_pages). S'ils contiennent déjà les
+    titres candidats (retraitement), les pages ne sont pas relues ; sinon la liste est
+    remplie avec le nouveau scan, réutilisable par l'extraction des images
+    workers : nombre de processus pour l'analyse des pages (voir scan_pages)
     """
     sections = []
-    potential_sections = []
     
-    # Patterns spécialisés pour détecter sections et sous-sections
-    section_patterns = [
-        # Patterns principaux identifiés dans l'analyse
-        r'^(\d+)\.\s+(.{3,100})$',           # 1. TITRE (pattern principal)
-        r'^(\d+\.\d+)\.\s+(.{3,100})$',      # 1.1. TITRE (sous-sections)
-        r'^(\d+\.\d+\.\d+)\.\s+(.{3,100})$', # 1.1.1. TITRE (sous-sous-sections)
-        
-        # Patterns alternatifs
-        r'^(\d+)\s+(.{3,100})$',             # 1 TITRE (sans point)
-        r'^(\d+\.\d+)\s+(.{3,100})$',        # 1.1 TITRE (sans point final)
-        r'^(\d+\.\d+\.\d+)\s+(.{3,100})$',   # 1.1.1 TITRE (sans point final)
-        
-        # Patterns avec mots-clés
-        r'^SECTION\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
-        r'^CHAPITRE\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
-        r'^PARTIE\s+(\d+)\s*[:\-]?\s*(.{3,100})$',
-    ]
+    if page_scans and all(scan['headings'] is not None for scan in page_scans):
+        print(f"♻️  Titres candidats de {len(page_scans)} pages déjà connus")
+        scans = page_scans
+    else:
+        print(f"🔍 Analyse de {len(pdf_document)} pages pour détecter les sections...")
+        scans = scan_pages(pdf_document, collect_headings=True, progress_callback=progress_callback, workers=workers)
+        if page_scans is not None:
+            page_scans[:] = scans
     
-    print(f"🔍 Analyse de {len(pdf_document)} pages pour détecter les sections...")
-    
-    for page_num in range(len(pdf_document)):
-        page = pdf_document[page_num]
-        blocks = page.get_text("dict")
-        
-        for block in blocks["blocks"]:
-            if "lines" in block:
-                for line in block["lines"]:
-                    # Reconstituer le texte de la ligne
-                    line_text = ""
-                    max_font_size = 0
-                    is_bold = False
-                    total_flags = 0
-                    span_count = 0
-                    
-                    for span in line["spans"]:
-                        line_text += span["text"]
-                        max_font_size = max(max_font_size, span["size"])
-                        total_flags += span["flags"]
-                        span_count += 1
-                        if span["flags"] & 2**4:  # Gras
-                            is_bold = True
-                    
-                    line_text = line_text.strip()
-                    
-                    # Critères de base pour qu'une ligne soit candidate
-                    if (len(line_text) >= 3 and len(line_text) <= 120 and  # Longueur raisonnable
-                        max_font_size >= 10.0 and  # Taille de police suffisante (abaissé pour sous-sections)
-                        not line_text.isdigit() and  # Pas juste un chiffre
-                        not re.match(r'^\d{1,2}/\d{1,2}/\d{4}', line_text) and  # Pas une date
-                        not line_text.lower().startswith(('page ', 'figure ', 'table ', 'annexe', 'login', 'mot de passe'))):
-                        
-                        # Tester les patterns de section
-                        for pattern in section_patterns:
-                            match = re.match(pattern, line_text, re.IGNORECASE)
-                            if match:
-                                section_number = match.group(1)
-                                section_title = match.group(2).strip()
-                                
-                                # Validation supplémentaire du titre
-                                if (len(section_title) >= 3 and  # Titre suffisamment long
-                                    not re.match(r'^[\d\s\.\-\)\(\[\]]+$', section_title) and  # Pas que des chiffres/symboles
-                                    not section_title.lower().startswith(('login', 'mot de passe', 'password', 'user')) and
-                                    len([c for c in section_title if c.isalpha()]) >= 3):  # Au moins 3 lettres
-                                    
-                                    # Calculer le score de qualité de la section
-                                    quality_score = 0
-                                    
-                                    # Bonus pour taille de police importante
-                                    if max_font_size >= 16.0:
-                                        quality_score += 3
-                                    elif max_font_size >= 12.0:
-                                        quality_score += 2
-                                    elif max_font_size >= 10.0:
-                                        quality_score += 1
-                                    
-                                    # Bonus pour gras
-                                    if is_bold:
-                                        quality_score += 2
-                                    
-                                    # Bonus pour titre en majuscules (style administratif)
-                                    if section_title.isupper() and len(section_title) > 5:
-                                        quality_score += 1
-                                    
-                                    # Bonus pour numérotation (ajustement pour favoriser les sous-sections)
-                                    dots_count = section_number.count('.')
-                                    if dots_count == 0:
-                                        quality_score += 3  # Section principale
-                                    elif dots_count == 1:
-                                        quality_score += 2  # Sous-section (préservée)
-                                    elif dots_count == 2:
-                                        quality_score += 1  # Sous-sous-section
-                                    
-                                    # Bonus spécial pour les sous-sections bien formées
-                                    if '.' in section_number and max_font_size >= 11.0:
-                                        quality_score += 1
-                                    
-                                    # Malus pour certains patterns suspects
-                                    if re.search(r'\d{4}', section_title):  # Contient une année
-                                        quality_score -= 2
-                                    if len(section_title) > 80:  # Titre trop long
-                                        quality_score -= 1
-                                    
-                                    # Calculer le niveau hiérarchique
-                                    if '.' in section_number:
-                                        level = len(section_number.split('.'))
-                                    else:
-                                        level = 1
-                                    
-                                    potential_sections.append({
-                                        'number': section_number,
-                                        'title': section_title,
-                                        'full_title': f"{section_number}. {section_title}",
-                                        'page': page_num + 1,
-                                        'font_size': max_font_size,
-                                        'is_bold': is_bold,
-                                        'level': level,
-                                        'quality_score': quality_score,
-                                        'pattern_used': pattern
-                                    })
-                                break  # Arrêter après le premier pattern qui matche
+    potential_sections = [candidate for scan in scans for candidate in scan['headings']]
     
     # Filtrer et trier les sections par qualité
     print(f"📊 {len(potential_sections)} sections candidates trouvées, filtrage en cours...")
@@ -218,6 +682,9 @@ def detect_sections(pdf_document):
         # Mode intelligent : préserver les sous-sections importantes
         main_sections = [s for s in unique_sections if s['level'] == 1]
         sub_sections = [s for s in unique_sections if s['level'] > 1]
+        main_sections_by_number = {}
+        for s in main_sections:
+            main_sections_by_number.setdefault(s['number'], s)
         
         if len(main_sections) >= 2:
             print(f"🏗️  Consolidation intelligente: {len(main_sections)} sections principales, {len(sub_sections)} sous-sections")
@@ -237,7 +704,7 @@ def detect_sections(pdf_document):
                 
                 # Préserver si sur une page différente de sa section parent
                 parent_number = sub['number'].split('.')[0]
-                parent_section = next((s for s in main_sections if s['number'] == parent_number), None)
+                parent_section = main_sections_by_number.get(parent_number)
                 if parent_section and sub['page'] != parent_section['page']:
                     preserve_subsection = True
                     print(f"  ✅ Sous-section préservée (page différente): {sub['number']}")
@@ -260,33 +727,14 @@ def detect_sections(pdf_document):
         consolidated_sections.sort(key=natural_sort_key)
         
         # Calculer les plages de pages pour chaque section
-        for i, section in enumerate(consolidated_sections):
-            start_page = section['page']
-            
-            # Trouver la page de fin en regardant la section suivante de même niveau ou supérieur
-            end_page = len(pdf_document)  # Par défaut jusqu'à la fin
-            current_level = section['level']
-            
-            # Chercher la prochaine section de niveau égal ou supérieur
-            for j in range(i + 1, len(consolidated_sections)):
-                next_section = consolidated_sections[j]
-                next_level = next_section['level']
-                
-                # Si on trouve une section de même niveau ou supérieur (moins profonde)
-                if next_level <= current_level:
-                    end_page = next_section['page'] - 1
-                    break
-            
-            # S'assurer qu'on a au moins une page
-            if end_page < start_page:
-                end_page = start_page
-            
+        end_pages = compute_section_end_pages(consolidated_sections, len(pdf_document))
+        for section, end_page in zip(consolidated_sections, end_pages):
             sections.append({
                 'number': section['number'],
                 'title': section['full_title'][:100],  # Limiter la longueur
-                'start_page': start_page,
+                'start_page': section['page'],
                 'end_page': end_page,
-                'level': current_level
+                'level': section['level']
             })
     
     # Si aucune section de qualité trouvée, créer des sections par défaut
@@ -334,76 +782,224 @@ def detect_sections(pdf_document):
     return sections
 
 def calculate_image_hash(image_data):
-    """Calcule un hash perceptuel pour détecter les images vraiment identiques"""
+    """
+    Calcule un hash perceptuel pour détecter les images vraiment identiques
+    
+    Returns:
+        int: Hash de HASH_BITS bits empaqueté dans un entier (bit de poids fort = premier pixel)
+    """
     try:
         # Ouvrir l'image
         img = Image.open(BytesIO(image_data))
         
-        # Hash plus précis : 16x16 pixels au lieu de 8x8
-        img = img.convert('L').resize((16, 16), Image.LANCZOS)
+        # JPEG : décodage en mode draft (réduction DCT 1/2 à 1/8), inutile de décoder en pleine résolution
+        img.draft('L', (HASH_DECODE_SIZE, HASH_DECODE_SIZE))
         
-        # Calculer le hash perceptuel (average hash)
-        pixels = list(img.getdata())
-        avg = sum(pixels) / len(pixels)
-        hash_bits = ''.join('1' if pixel > avg else '0' for pixel in pixels)
+        return hash_pil_image(img)
+    except Exception as e:
+        print(f"Erreur calcul hash: {e}")
+        return None
+
+def hash_pil_image(img):
+    """Hash perceptuel (average hash) d'une image PIL, idéalement déjà réduite"""
+    # Hash plus précis : 16x16 pixels au lieu de 8x8
+    img = img.convert('L').resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS)
+    
+    # Calculer le hash perceptuel (average hash)
+    pixels = np.asarray(img, dtype=np.uint8).ravel()
+    avg = int(pixels.sum()) / pixels.size
+    hash_bytes = np.packbits(pixels > avg).tobytes()
+    
+    return int.from_bytes(hash_bytes, 'big')
+
+def calculate_pixmap_hash(pix):
+    """
+    Calcule le hash perceptuel depuis un pixmap en cours d'extraction
+    
+    Le hash est calculé sur une copie réduite à environ HASH_DECODE_SIZE pixels du
+    pixmap (gris ou RGB, sans alpha) : les bytes pleine résolution ne sont jamais
+    re-décodés pour le hash, et le pixmap d'origine reste intact pour l'encodage.
+    """
+    try:
+        scale = HASH_DECODE_SIZE / min(pix.width, pix.height)
+        if scale < 1:
+            pix = fitz.Pixmap(pix, max(1, round(pix.width * scale)), max(1, round(pix.height * scale)), None)
         
-        return hash_bits
+        mode = 'L' if pix.n == 1 else 'RGB'
+        img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+        return hash_pil_image(img)
     except Exception as e:
         print(f"Erreur calcul hash: {e}")
         return None
 
-def are_images_similar(hash1, hash2, threshold=25):
+def hash_distance(hash1, hash2):
+    """Nombre de bits différents entre deux hashs (XOR + popcount)"""
+    return bin(hash1 ^ hash2).count('1')
+
+def are_images_similar(hash1, hash2, threshold=SIMILARITY_THRESHOLD):
     """Compare deux hashs et retourne True si les images sont vraiment identiques"""
-    if not hash1 or not hash2 or len(hash1) != len(hash2):
+    if hash1 is None or hash2 is None:
         return False
     
-    # Compter les différences bit par bit
-    differences = sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
-    
     # Avec hash 16x16 (256 bits), seuil optimisé :
     # 25 bits sur 256 = ~10% de différence maximum (plus réaliste pour éviter les faux positifs)
-    return differences <= threshold
+    return hash_distance(hash1, hash2) <= threshold
+
+def hashes_to_array(hashes):
+    """Convertit une liste de hashs entiers en tableau NumPy (n, HASH_WORDS) de uint64"""
+    packed = b''.join(h.to_bytes(HASH_BITS // 8, 'big') for h in hashes)
+    return np.frombuffer(packed, dtype='>u8').reshape(len(hashes), HASH_WORDS).astype(np.uint64)
+
+def _popcount_rows(words):
+    """Popcount par ligne d'un tableau (n, HASH_WORDS) de uint64"""
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+def hash_distances(hash_array, index, start=0):
+    """
+    Distances de Hamming entre le hash hash_array[index] et les hashs hash_array[start:]
+    calculées en une seule opération vectorisée
+    """
+    return _popcount_rows(np.bitwise_xor(hash_array[start:], hash_array[index]))
+
+def build_band_index(hash_array, band_count):
+    """
+    Index multi-bandes des hashs (multi-index hashing)
+    
+    Les HASH_BITS bits sont découpés en band_count bandes contiguës ; pour chaque bande,
+    un dictionnaire associe la valeur de la bande aux indices (croissants) des hashs.
+    Principe des tiroirs : deux hashs à distance <= band_count - 1 ont au moins une
+    bande identique, donc se retrouvent dans un même compartiment.
+    
+    Returns:
+        tuple: (valeurs des bandes (n, band_count), liste de dictionnaires {valeur: indices})
+    """
+    bits = np.unpackbits(hash_array.astype('>u8').view(np.uint8), axis=1)
+    bounds = np.linspace(0, HASH_BITS, band_count + 1).astype(int)
+    
+    band_values = np.empty((len(hash_array), band_count), dtype=np.int64)
+    buckets = []
+    for band, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        weights = 1 << np.arange(end - start - 1, -1, -1, dtype=np.int64)
+        values = bits[:, start:end].astype(np.int64) @ weights
+        band_values[:, band] = values
+        
+        # Regrouper les indices par valeur (tri stable : indices croissants par compartiment)
+        order = np.argsort(values, kind='stable')
+        keys, starts = np.unique(values[order], return_index=True)
+        buckets.append(dict(zip(keys.tolist(), np.split(order, starts[1:]))))
+    
+    return band_values, buckets
+
+def group_similar_hashes(hash_array, threshold=SIMILARITY_THRESHOLD):
+    """
+    Regroupe les hashs similaires (distance de Hamming <= threshold)
+    
+    Même résultat que le regroupement glouton par paires : chaque hash non encore
+    groupé, dans l'ordre, forme un groupe avec tous les hashs suivants non groupés
+    à distance <= threshold. Les voisins sont cherchés dans l'index multi-bandes
+    puis vérifiés par XOR + popcount, sans parcourir toutes les paires.
+    
+    Returns:
+        list: Groupes d'indices (croissants), un groupe par hash non absorbé
+    """
+    count = len(hash_array)
+    if count == 0:
+        return []
+    
+    band_count = min(threshold + 1, HASH_BITS)
+    band_values, buckets = build_band_index(hash_array, band_count)
+    processed = np.zeros(count, dtype=bool)
+    groups = []
+    
+    for i in range(count):
+        if processed[i]:
+            continue
+        processed[i] = True
+        
+        # Candidats : hashs partageant au moins une bande avec hash i
+        candidate_lists = []
+        for band, key in enumerate(band_values[i].tolist()):
+            bucket = buckets[band][key]
+            if len(bucket) > BAND_COMPACT_SIZE:
+                # Compactage des gros compartiments (logos répétés) : retirer les hashs déjà groupés
+                bucket = bucket[~processed[bucket]]
+                buckets[band][key] = bucket
+            candidate_lists.append(bucket)
+        
+        candidates = np.concatenate(candidate_lists)
+        candidates = candidates[(candidates > i) & ~processed[candidates]]
+        
+        # Vérification exacte (un candidat présent dans plusieurs bandes est dédoublonné ensuite)
+        distances = _popcount_rows(np.bitwise_xor(hash_array[candidates], hash_array[i]))
+        matches = np.unique(candidates[distances <= threshold])
+        processed[matches] = True
+        
+        groups.append([i] + matches.tolist())
+    
+    return groups
 
-def filter_duplicate_images(image_data_list, min_occurrences=6):
+def filter_duplicate_images(image_data_list, min_occurrences=6, xref_cache=None, progress_callback=None, duplicate_hashes=None):
     """
     Filtre les images qui apparaissent plus de min_occurrences fois
     (logos, headers, footers, etc.) en conservant le meilleur exemplaire
+    
+    xref_cache (optionnel) : cache {xref: {'data', 'hash', 'encoding'}} du document ; une image
+    répétée (même xref) n'est hashée qu'une seule fois.
+    progress_callback (optionnel) : appelé avec ('dedupe', images hashées, total, ...) puis
+    avec le nombre de groupes de doublons trouvés
+    duplicate_hashes (optionnel) : liste complétée avec (hash, occurrences) pour chaque
+    groupe filtré (alimente l'index des images récurrentes)
     """
     print(f"\n🔍 Analyse des images dupliquées...")
     
-    # Calculer les hashs pour toutes les images
+    if xref_cache is None:
+        xref_cache = {}
+    
+    # Calculer les hashs pour toutes les images (une seule fois par xref)
     image_hashes = []
+    hashed_count = 0
     for i, (image_data, metadata) in enumerate(image_data_list):
-        hash_value = calculate_image_hash(image_data)
-        if hash_value:
+        if progress_callback:
+            progress_callback('dedupe', i, len(image_data_list), hashed=hashed_count)
+        
+        xref = metadata.get('xref')
+        cache_entry = xref_cache.setdefault(xref, {'data': image_data, 'hash': None, 'encoding': metadata.get('encoding')}) if xref else None
+        
+        if 'hash' in metadata:
+            # Hash déjà calculé à l'extraction (enregistrement léger, bytes non relus)
+            hash_value = metadata['hash']
+        elif cache_entry is not None and cache_entry['hash'] is not None:
+            hash_value = cache_entry['hash']
+        else:
+            hash_value = calculate_image_hash(image_data)
+            hashed_count += 1
+            if cache_entry is not None:
+                cache_entry['hash'] = hash_value
+        
+        if hash_value is not None:
             image_hashes.append({
                 'index': i,
                 'hash': hash_value,
                 'metadata': metadata,
-                'data': image_data
+                'size': metadata['size'] if 'size' in metadata else len(image_data)
             })
     
-    # Grouper les images similaires
-    duplicate_groups = []
-    processed_indices = set()
+    print(f"  #️⃣ {hashed_count} hashs calculés pour {len(image_data_list)} images (xrefs répétés réutilisés)")
     
-    for i, img1 in enumerate(image_hashes):
-        if i in processed_indices:
-            continue
-            
-        group = [img1]
-        processed_indices.add(i)
-        
-        for j, img2 in enumerate(image_hashes[i+1:], i+1):
-            if j in processed_indices:
-                continue
-                
-            if are_images_similar(img1['hash'], img2['hash']):
-                group.append(img2)
-                processed_indices.add(j)
-        
-        if len(group) > 1:
-            duplicate_groups.append(group)
+    # Grouper les images similaires (index multi-bandes, sans comparaison de toutes les paires)
+    hash_array = hashes_to_array([img['hash'] for img in image_hashes])
+    duplicate_groups = [
+        [image_hashes[j] for j in group]
+        for group in group_similar_hashes(hash_array)
+        if len(group) > 1
+    ]
+    
+    if progress_callback:
+        progress_callback('dedupe', len(image_data_list), len(image_data_list), hashed=hashed_count,
+                          groups=len(duplicate_groups),
+                          filtered_groups=sum(1 for group in duplicate_groups if len(group) >= min_occurrences))
     
     # Identifier les images à filtrer (nouvelle logique : conserver le meilleur)
     filtered_indices = set()
@@ -412,9 +1008,12 @@ def filter_duplicate_images(image_data_list, min_occurrences=6):
             print(f"  📋 Groupe d'images dupliquées détecté: {len(group)} occurrences")
             print(f"     Exemple: page {group[0]['metadata']['page']}")
             
+            if duplicate_hashes is not None:
+                duplicate_hashes.append((group[0]['hash'], len(group)))
+            
             # Trouver le meilleur exemplaire (par taille d'image)
-            best_img = max(group, key=lambda img: len(img['data']))
-            print(f"     Meilleur exemplaire conservé: page {best_img['metadata']['page']} ({len(best_img['data'])} bytes)")
+            best_img = max(group, key=lambda img: img['size'])
+            print(f"     Meilleur exemplaire conservé: page {best_img['metadata']['page']} ({best_img['size']} bytes)")
             
             # Marquer les autres pour filtrage (pas le meilleur)
             for img in group:
@@ -433,207 +1032,890 @@ def filter_duplicate_images(image_data_list, min_occurrences=6):
     
     return filtered_images
 
-def extract_images_from_pdf(pdf_path, output_folder, document_name, filter_duplicates=True, detect_hierarchy=True):
+def is_known_boilerplate(hash_value, boilerplate_array):
+    """Vérifie si un hash correspond à une image récurrente connue (index persistant)"""
+    if hash_value is None or boilerplate_array is None or not len(boilerplate_array):
+        return False
+    distances = _popcount_rows(np.bitwise_xor(boilerplate_array, hashes_to_array([hash_value])[0]))
+    return bool(distances.min() <= SIMILARITY_THRESHOLD)
+
+def get_downscale_size(width, height, image_filter):
     """
-    Extrait les images du PDF en respectant la nomenclature
-    CRL-[NOM DU DOC]-X.X.X n_Y.jpg avec filtrage des images dupliquées
+    Dimensions de sortie d'une image soumise au plafond de résolution
+    
+    Args:
+        image_filter (dict): 'max_dimension' (pixels, plus grand côté) et/ou
+                             'max_megapixels' ; 0 ou absent = pas de plafond
+    
+    Returns:
+        tuple: (largeur, hauteur) réduites en conservant les proportions, ou None
+        si l'image respecte le plafond
     """
-    pdf_document = fitz.open(pdf_path)
+    if not image_filter:
+        return None
+    scale = 1.0
+    max_dimension = image_filter.get('max_dimension')
+    if max_dimension and max(width, height) > max_dimension:
+        scale = min(scale, max_dimension / max(width, height))
+    max_megapixels = image_filter.get('max_megapixels')
+    if max_megapixels and width * height > max_megapixels * 1_000_000:
+        scale = min(scale, math.sqrt(max_megapixels * 1_000_000 / (width * height)))
+    if scale >= 1:
+        return None
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def downscale_jpeg(jpeg_data, target_size):
+    """
+    Réduit un JPEG natif aux dimensions demandées
     
-    # Utiliser le nom de document fourni
-    clean_filename = document_name
+    Le décodage se fait en mode draft (réduction DCT 1/2 à 1/8 dans le décodeur) :
+    l'image n'est jamais décodée en pleine résolution.
+    """
+    img = Image.open(BytesIO(jpeg_data))
+    img.draft(img.mode, target_size)
+    if img.size != target_size:
+        img = img.resize(target_size, Image.LANCZOS)
+    buffer = BytesIO()
+    img.save(buffer, 'JPEG', quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+def decode_image_xref(pdf_document, xref, compute_hash=False, boilerplate_array=None, image_filter=None):
+    """
+    Décode une image du PDF directement en bytes JPEG (format de sortie final)
     
-    # Détecter les sections selon l'option
-    if detect_hierarchy:
-        sections = detect_sections(pdf_document)
-    else:
-        # Créer des sections par défaut sans hiérarchie
-        total_pages = len(pdf_document)
-        pages_per_section = max(5, total_pages // 3)
-        sections = []
-        section_num = 1
-        
-        for start in range(1, total_pages + 1, pages_per_section):
-            end = min(start + pages_per_section - 1, total_pages)
-            sections.append({
-                'number': str(section_num),
-                'title': f'{section_num}. Section {section_num}',
-                'start_page': start,
-                'end_page': end,
-                'level': 1
-            })
-            section_num += 1
+    Les flux DCTDecode (JPEG natif) en niveaux de gris ou RGB sont copiés
+    octet pour octet, sans décodage ni perte de génération. Les autres formats
+    sont convertis une seule fois en JPEG depuis le pixmap.
     
-    # Première passe : collecter toutes les images avec leurs métadonnées
-    all_images_data = []
+    Si compute_hash, le hash perceptuel est calculé pendant l'extraction : depuis
+    le pixmap réduit, ou par décodage draft du JPEG natif.
     
-    for page_num in range(len(pdf_document)):
-        page = pdf_document[page_num]
-        
-        # Trouver toutes les sections qui couvrent cette page
-        page_sections = []
-        for section in sections:
-            if section['start_page'] <= page_num + 1 <= section['end_page']:
-                page_sections.append(section)
-        
-        # Trier par niveau (privilégier les sous-sections) puis par numéro
-        if page_sections:
-            def section_priority(section):
-                level = section.get('level', 1)
-                try:
-                    # Convertir le numéro de section en tuple pour tri naturel
-                    parts = [int(x) for x in section['number'].split('.')]
-                    while len(parts) < 4:
-                        parts.append(0)
-                    return (-level, parts)  # Niveau négatif pour trier par niveau décroissant
-                except:
-                    return (-level, [999, 999, 999, 999])
-            
-            page_sections.sort(key=section_priority)
-        
-        if not page_sections:
-            page_sections = [sections[0]]  # Section par défaut
-        
-        # Obtenir les images de la page
-        image_list = page.get_images()
-        
-        # Distribuer intelligemment les images entre les sections de la page
-        for img_index, img in enumerate(image_list):
-            try:
-                # Extraire l'image avec annotations intégrées
-                xref = img[0]
-                
-                # Extraction directe de l'image (méthode plus fiable)
-                try:
-                    # Extraction directe sans utiliser get_image_rects qui peut être imprécise
-                    pix = fitz.Pixmap(pdf_document, xref)
-                    print(f"  📷 Image {img_index+1} extraite (méthode directe)")
-                    
-                except Exception as e:
-                    # En cas d'erreur, ignorer cette image
-                    print(f"  ❌ Erreur extraction image {img_index+1}: {str(e)}")
-                    continue
-                
-                # Convertir en RGB si nécessaire
-                if pix.n - pix.alpha < 4:
-                    img_data = pix.pil_tobytes(format="PNG")
-                else:
-                    pix_rgb = fitz.Pixmap(fitz.csRGB, pix)
-                    img_data = pix_rgb.pil_tobytes(format="PNG")
-                    pix_rgb = None
-                
-                # Choisir la section pour cette image
-                # Si plusieurs sous-sections sur la page, distribuer en round-robin
-                if len(page_sections) == 1:
-                    assigned_section = page_sections[0]
-                else:
-                    # Séparer les sous-sections des sections principales
-                    subsections = [s for s in page_sections if s.get('level', 1) > 1]
-                    main_sections = [s for s in page_sections if s.get('level', 1) == 1]
-                    
-                    if subsections:
-                        # Distribuer entre les sous-sections en round-robin
-                        assigned_section = subsections[img_index % len(subsections)]
-                        print(f"  🎯 Image {img_index+1} assignée à la sous-section {assigned_section['number']}")
+    boilerplate_array (optionnel) : hashs des images récurrentes connues. Une image
+    correspondante est ignorée avant tout encodage JPEG.
+    
+    image_filter (optionnel) : plafond de résolution (voir get_downscale_size). Une image
+    plus grande est réduite avant encodage (encoding 'downscaled') : décodage DCT réduit
+    pour les JPEG natifs, copie réduite du pixmap avant conversion pour les autres formats.
+    
+    Returns:
+        tuple: (bytes JPEG ou None, 'passthrough', 'transcoded', 'downscaled' ou 'boilerplate', hash ou None)
+    """
+    compute_hash = compute_hash or (boilerplate_array is not None and len(boilerplate_array) > 0)
+    
+    # JPEG natif : flux brut utilisable tel quel (sauf tableau /Decode qui inverserait les couleurs)
+    if (pdf_document.xref_get_key(xref, "Filter") == ('name', '/DCTDecode') and
+        pdf_document.xref_get_key(xref, "Decode")[0] == 'null'):
+        raw_image = pdf_document.extract_image(xref)
+        if raw_image and raw_image['ext'] in ('jpeg', 'jpg') and raw_image['colorspace'] in (1, 3):
+            hash_value = calculate_image_hash(raw_image['image']) if compute_hash else None
+            if is_known_boilerplate(hash_value, boilerplate_array):
+                return None, 'boilerplate', hash_value
+            target_size = get_downscale_size(raw_image['width'], raw_image['height'], image_filter)
+            if target_size is not None:
+                return downscale_jpeg(raw_image['image'], target_size), 'downscaled', hash_value
+            return raw_image['image'], 'passthrough', hash_value
+    
+    # Extraction directe sans utiliser get_image_rects qui peut être imprécise
+    pix = fitz.Pixmap(pdf_document, xref)
+    
+    # Plafond de résolution : copie réduite avant conversion, hash et encodage,
+    # le pixmap pleine résolution est libéré aussitôt
+    target_size = get_downscale_size(pix.width, pix.height, image_filter)
+    if target_size is not None:
+        pix = fitz.Pixmap(pix, target_size[0], target_size[1], None)
+    
+    # Convertir en RGB si nécessaire (CMYK, etc.)
+    if pix.n - pix.alpha >= 4:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    # Le JPEG ne supporte pas la transparence
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    
+    # Hash sur une copie réduite du pixmap, avant l'encodage
+    hash_value = calculate_pixmap_hash(pix) if compute_hash else None
+    if is_known_boilerplate(hash_value, boilerplate_array):
+        return None, 'boilerplate', hash_value
+    
+    try:
+        img_data = pix.tobytes(output="jpeg", jpg_quality=JPEG_QUALITY)
+    except Exception:
+        # Espace colorimétrique non supporté par l'encodeur MuPDF : passer par PIL
+        img_pil = Image.open(BytesIO(pix.pil_tobytes(format="PNG")))
+        if img_pil.mode not in ('RGB', 'L'):
+            img_pil = img_pil.convert('RGB')
+        buffer = BytesIO()
+        img_pil.save(buffer, 'JPEG', quality=JPEG_QUALITY)
+        img_data = buffer.getvalue()
+    
+    return img_data, 'downscaled' if target_size is not None else 'transcoded', hash_value
+
+def section_priority(section):
+    """Clé de tri des sections d'une page : sous-sections d'abord, puis ordre naturel des numéros"""
+    level = section.get('level', 1)
+    try:
+        # Convertir le numéro de section en tuple pour tri naturel
+        parts = [int(x) for x in section['number'].split('.')]
+        while len(parts) < 4:
+            parts.append(0)
+        return (-level, parts)  # Niveau négatif pour trier par niveau décroissant
+    except:
+        return (-level, [999, 999, 999, 999])
+
+def build_section_index(sections):
+    """
+    Construit l'index des intervalles de pages couverts par les sections
+    
+    Les bornes de toutes les sections découpent le document en plages de pages
+    couvertes par le même ensemble de sections ; cet ensemble est calculé et trié
+    par priorité une seule fois par plage (balayage des bornes).
+    
+    Returns:
+        dict: 'boundaries' (première page de chaque plage, triées), 'page_sections'
+        (sections de chaque plage) et 'default' (section utilisée hors de toute plage)
+    """
+    events = defaultdict(list)
+    for position, section in enumerate(sections):
+        if section['start_page'] <= section['end_page']:
+            events[section['start_page']].append((position, section))
+            events[section['end_page'] + 1].append((position, None))
+    
+    boundaries = []
+    page_sections = []
+    active = {}
+    for page_number in sorted(events):
+        for position, section in events[page_number]:
+            if section is None:
+                active.pop(position, None)
+            else:
+                active[position] = section
+        boundaries.append(page_number)
+        # Tri stable : à priorité égale, l'ordre des sections est conservé
+        page_sections.append([active[position] for position in sorted(active)])
+        page_sections[-1].sort(key=section_priority)
+    
+    return {
+        'boundaries': boundaries,
+        'page_sections': page_sections,
+        'default': sections[:1]
+    }
+
+def get_page_sections(section_index, page_number):
+    """
+    Retourne les sections couvrant une page, triées par priorité
+    (sous-sections d'abord, puis ordre naturel des numéros)
+    
+    Recherche dichotomique dans l'index construit par build_section_index.
+    """
+    position = bisect_right(section_index['boundaries'], page_number) - 1
+    page_sections = section_index['page_sections'][position] if position >= 0 else []
+    
+    if not page_sections:
+        page_sections = section_index['default']  # Section par défaut
+    
+    return page_sections
+
+def assign_image_section(page_sections, img_index):
+    """
+    Choisit la section d'une image parmi les sections de sa page
+    Si plusieurs sous-sections sur la page, distribuer en round-robin
+    """
+    if len(page_sections) == 1:
+        return page_sections[0]
+    
+    # Séparer les sous-sections des sections principales
+    subsections = [s for s in page_sections if s.get('level', 1) > 1]
+    main_sections = [s for s in page_sections if s.get('level', 1) == 1]
+    
+    if subsections:
+        # Distribuer entre les sous-sections en round-robin
+        assigned_section = subsections[img_index % len(subsections)]
+        print(f"  🎯 Image {img_index+1} assignée à la sous-section {assigned_section['number']}")
+        return assigned_section
+    
+    # Pas de sous-sections, utiliser la première section principale
+    return main_sections[0] if main_sections else page_sections[0]
+
+def reuse_page_images(page_num, records, section_index, page_scan, boilerplate_array=None, output_folder=None, compute_hash=False):
+    """
+    Reconstitue les images d'une page inchangée depuis le manifeste de la révision précédente
+    
+    Rien n'est décodé : hash, taille et emplacement viennent du manifeste, la section est
+    réassignée d'après les sections actuelles. metadata['reused_filename'] désigne le fichier
+    déjà écrit pour l'image (None si elle avait été filtrée ou ignorée).
+    
+    Si compute_hash et que le manifeste n'a pas de hash (filtrage désactivé lors de
+    l'extraction précédente), le hash est calculé depuis le fichier déjà écrit.
+    
+    Returns:
+        list: Liste de tuples (None, metadata) dans l'ordre de la page
+    """
+    page_sections = get_page_sections(section_index, page_num + 1)
+    page_images = []
+    
+    for record in records:
+        img_index = record['img_index']
+        hash_value = record['hash']
+        if compute_hash and hash_value is None and record['filename'] and output_folder:
+            filepath = os.path.join(output_folder, record['filename'])
+            if os.path.exists(filepath):
+                with open(filepath, 'rb') as f:
+                    hash_value = calculate_image_hash(f.read())
+        
+        encoding = record['encoding']
+        if is_known_boilerplate(hash_value, boilerplate_array):
+            encoding = 'boilerplate'
+        elif encoding == 'boilerplate':
+            # Image ignorée lors de l'extraction précédente : à décoder si elle est conservée
+            encoding = None
+        
+        metadata = {
+            'page': page_num + 1,
+            'section': assign_image_section(page_sections, img_index),
+            'img_index': img_index,
+            # Xref du PDF courant : l'empreinte de page ne couvre pas les numéros d'objets,
+            # une révision renumérotée réutilise la page avec d'autres xrefs
+            'xref': page_scan['images'][img_index][0],
+            'encoding': encoding,
+            'bbox': record['bbox'],
+            'hash': hash_value,
+            'size': record['size'] or 0,
+            'reused_filename': record['filename']
+        }
+        if record.get('prefilter'):
+            metadata['prefilter'] = record['prefilter']
+        if encoding == 'downscaled':
+            img = page_scan['images'][img_index]
+            metadata['original_size'] = (img[2], img[3])
+        page_images.append((None, metadata))
+    
+    return page_images
+
+def get_mask_xrefs(image_list):
+    """Xrefs des images servant de masque (SMask) à une autre image de la page"""
+    return {img[1] for img in image_list if img[1]}
+
+def prefilter_image(img, mask_xrefs, image_filter):
+    """
+    Décide d'après les métadonnées de get_images() si une image est ignorée sans être décodée
+    
+    Args:
+        img (tuple): Entrée de page.get_images() (xref, smask, largeur, hauteur, bpc, espace couleur, ...)
+        mask_xrefs (set): Xrefs des masques de la page (voir get_mask_xrefs)
+        image_filter (dict): Seuils 'min_dimension', 'min_area' (pixels) et 'skip_masks'
+    
+    Returns:
+        str: Motif ('mask', 'dimension' ou 'area') ou None si l'image est à extraire
+    """
+    if not image_filter:
+        return None
+    xref, _, width, height, bpc, colorspace = img[:6]
+    # Masque de transparence d'une autre image, ou masque de détourage 1 bit sans couleurs
+    if image_filter.get('skip_masks') and (xref in mask_xrefs or (bpc == 1 and not colorspace)):
+        return 'mask'
+    if min(width, height) < image_filter.get('min_dimension', 0):
+        return 'dimension'
+    if width * height < image_filter.get('min_area', 0):
+        return 'area'
+    return None
+
+def extract_page_images(pdf_document, page_num, section_index, xref_cache=None, compute_hash=False, boilerplate_array=None, page_scan=None, image_filter=None):
+    """
+    Extrait les images d'une page et leur assigne une section
+    
+    xref_cache (optionnel) : cache {xref: {'data', 'hash', 'encoding'}} partagé par toutes les pages
+    du document. Une image déjà décodée (logo, bandeau répété sur chaque page)
+    n'est pas redécodée : ses bytes sont réutilisés par référence.
+    
+    compute_hash : calcule le hash perceptuel pendant le décodage (metadata['hash'])
+    boilerplate_array (optionnel) : hashs des images récurrentes connues, ignorées sans
+    encodage (encoding 'boilerplate', img_data None)
+    page_scan (optionnel) : scan de la page déjà effectué (voir scan_page) ; la page n'est
+    alors pas relue, les images sont décodées directement par xref
+    image_filter (optionnel) : seuils du pré-filtrage (voir prefilter_image). Les images
+    trop petites et les masques sont ignorés sans décodage (encoding 'prefiltered',
+    motif dans metadata['prefilter'])
+    
+    Returns:
+        list: Liste de tuples (img_data, metadata) dans l'ordre de la page
+    """
+    if page_scan is None:
+        page_scan = scan_page(pdf_document[page_num], page_num)
+    page_sections = get_page_sections(section_index, page_num + 1)
+    page_images = []
+    
+    # Images de la page et leurs emplacements
+    image_list = page_scan['images']
+    mask_xrefs = get_mask_xrefs(image_list)
+    
+    # Distribuer intelligemment les images entre les sections de la page
+    for img_index, img in enumerate(image_list):
+        try:
+            # Extraire l'image avec annotations intégrées
+            xref = img[0]
+            hash_value = None
+            
+            prefilter_reason = prefilter_image(img, mask_xrefs, image_filter)
+            if prefilter_reason:
+                # Ignorée d'après ses métadonnées : ni pixmap, ni conversion, ni encodage
+                img_data, encoding = None, 'prefiltered'
+            elif xref_cache is not None and xref in xref_cache:
+                # Image déjà décodée sur une page précédente : simple référence
+                img_data = xref_cache[xref]['data']
+                encoding = xref_cache[xref]['encoding']
+                hash_value = xref_cache[xref]['hash']
+                print(f"  ♻️  Image {img_index+1} déjà décodée (xref {xref})")
+            else:
+                # Extraction directe de l'image (méthode plus fiable)
+                try:
+                    img_data, encoding, hash_value = decode_image_xref(pdf_document, xref, compute_hash,
+                                                                        boilerplate_array, image_filter)
+                    if encoding == 'boilerplate':
+                        print(f"  🚫 Image {img_index+1} ignorée (image récurrente connue)")
+                    elif encoding == 'passthrough':
+                        print(f"  📷 Image {img_index+1} extraite (JPEG natif, sans ré-encodage)")
+                    elif encoding == 'downscaled':
+                        print(f"  📷 Image {img_index+1} extraite (réduite, {img[2]}x{img[3]} à l'origine)")
                     else:
-                        # Pas de sous-sections, utiliser la première section principale
-                        assigned_section = main_sections[0] if main_sections else page_sections[0]
-                
-                # Métadonnées de l'image
-                metadata = {
-                    'page': page_num + 1,
-                    'section': assigned_section,
-                    'img_index': img_index,
-                    'xref': xref
-                }
-                
-                all_images_data.append((img_data, metadata))
-                pix = None
+                        print(f"  📷 Image {img_index+1} extraite (méthode directe)")
+                    
+                except Exception as e:
+                    # En cas d'erreur, ignorer cette image
+                    print(f"  ❌ Erreur extraction image {img_index+1}: {str(e)}")
+                    continue
                 
-            except Exception as e:
-                print(f"Erreur lors de l'extraction de l'image {img_index} de la page {page_num + 1}: {str(e)}")
+                if xref_cache is not None:
+                    xref_cache[xref] = {'data': img_data, 'hash': hash_value, 'encoding': encoding}
+            
+            # Métadonnées de l'image
+            metadata = {
+                'page': page_num + 1,
+                'section': assign_image_section(page_sections, img_index),
+                'img_index': img_index,
+                'xref': xref,
+                'encoding': encoding,
+                'bbox': next(iter(page_scan['bboxes'].get(xref, [])), None)
+            }
+            if compute_hash or encoding == 'boilerplate':
+                metadata['hash'] = hash_value
+            if prefilter_reason:
+                metadata['prefilter'] = prefilter_reason
+            if encoding == 'downscaled':
+                metadata['original_size'] = (img[2], img[3])
+            
+            page_images.append((img_data, metadata))
+            
+        except Exception as e:
+            print(f"Erreur lors de l'extraction de l'image {img_index} de la page {page_num + 1}: {str(e)}")
+            continue
+    
+    return page_images
+
+def _extract_page_range(pdf_path, start_page, end_page, section_index, compute_hash=False, boilerplate_array=None, page_scans=None, skip_pages=None, image_filter=None):
+    """
+    Worker : ouvre son propre document fitz et extrait les pages [start_page, end_page[
+    
+    page_scans (optionnel) : scans des pages de la plage déjà effectués par le processus principal
+    skip_pages (optionnel) : pages à ne pas extraire (réutilisées d'une révision précédente)
+    """
+    pdf_document = fitz.open(pdf_path)
+    try:
+        page_images = []
+        xref_cache = {}  # Cache local au worker
+        for page_num in range(start_page, end_page):
+            if skip_pages and page_num in skip_pages:
                 continue
+            page_scan = page_scans[page_num - start_page] if page_scans else None
+            page_images.extend(extract_page_images(pdf_document, page_num, section_index, xref_cache, compute_hash,
+                                                   boilerplate_array, page_scan, image_filter))
+        return page_images
+    finally:
+        pdf_document.close()
+
+def split_page_range(total_pages, chunk_count):
+    """Découpe [0, total_pages[ en chunk_count plages contiguës de tailles équilibrées"""
+    chunk_count = max(1, min(chunk_count, total_pages))
+    base, extra = divmod(total_pages, chunk_count)
+    ranges = []
+    start = 0
+    for i in range(chunk_count):
+        end = start + base + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def iter_pages_parallel(pdf_path, total_pages, section_index, workers, compute_hash=False, boilerplate_array=None, page_scans=None, skip_pages=None, image_filter=None):
+    """
+    Répartit les pages du PDF entre un pool de processus
     
-    # Filtrer les images dupliquées selon l'option
-    if filter_duplicates:
-        filtered_images = filter_duplicate_images(all_images_data, min_occurrences=4)
-    else:
-        filtered_images = all_images_data
-        print(f"🔍 Filtrage désactivé - {len(filtered_images)} images conservées")
+    Les plages sont plus nombreuses que les workers pour équilibrer la charge
+    (pages scannées vs pages de texte) ; une nouvelle plage n'est lancée qu'après la
+    fusion d'une plage terminée (mémoire bornée à `workers` plages hors staging).
+    Les images de chaque plage sont produites
+    dans l'ordre des pages : le résultat est identique à une extraction séquentielle.
+    
+    page_scans (optionnel) : scans de toutes les pages (voir scan_pages), transmis aux
+    workers pour qu'ils ne relisent pas les pages
+    skip_pages (optionnel) : pages à ne pas extraire (voir _extract_page_range)
+    image_filter (optionnel) : seuils du pré-filtrage (voir prefilter_image)
+    
+    Yields:
+        tuple: (page de fin de la plage, liste de (img_data, metadata))
+    """
+    page_ranges = split_page_range(total_pages, workers * PARALLEL_CHUNKS_PER_WORKER)
+    print(f"⚡ Extraction parallèle: {total_pages} pages, {len(page_ranges)} plages, {workers} workers")
+    
+    def submit(start, end):
+        return executor.submit(_extract_page_range, pdf_path, start, end, section_index, compute_hash,
+                               boilerplate_array, page_scans[start:end] if page_scans else None,
+                               {page for page in skip_pages if start <= page < end} if skip_pages else None,
+                               image_filter)
+    
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Au plus `workers` plages en cours : les images d'une plage terminée restent en
+        # mémoire (résultat du Future) jusqu'à sa fusion, une plage lente en tête ne doit
+        # pas laisser s'accumuler celles de tout le document hors du budget du staging
+        remaining = deque(page_ranges)
+        pending = deque()
+        while remaining and len(pending) < workers:
+            start, end = remaining.popleft()
+            pending.append((end, submit(start, end)))
+        # Fusion dans l'ordre des plages (et donc des pages)
+        while pending:
+            end, future = pending.popleft()
+            page_images = future.result()
+            if remaining:
+                start, next_end = remaining.popleft()
+                pending.append((next_end, submit(start, next_end)))
+            yield end, page_images
+    finally:
+        # En cas d'erreur ou d'annulation, ne pas lancer les plages restantes
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def stage_page_images(staging, page_images, xref_cache, compute_hash=True, skipped_images=None, prefiltered_images=None):
+    """
+    Confie les images d'une page au staging et ne garde que des enregistrements légers
     
-    # Deuxième passe : sauvegarder les images filtrées avec UIDs uniques
-    extracted_files = []
+    Le hash perceptuel est normalement déjà calculé à l'extraction (depuis le pixmap
+    réduit) ; sinon il l'est ici pendant que les bytes sont encore en mémoire, une
+    seule fois par xref. Le filtrage des doublons travaille ensuite sur
+    metadata['hash'] et metadata['size'] sans relire les images.
     
-    for image_data, metadata in filtered_images:
-        current_section = metadata['section']
-        section_number = current_section['number']
+    Les images récurrentes connues (encoding 'boilerplate') ne sont pas stagées :
+    leurs métadonnées sont ajoutées à skipped_images, celles des images écartées par le
+    pré-filtrage (encoding 'prefiltered') à prefiltered_images. Les images des pages réutilisées d'une révision
+    précédente (voir reuse_page_images) n'ont pas de bytes et sont transmises telles quelles.
+    
+    Returns:
+        list: Liste de tuples (StagedImage, metadata)
+    """
+    staged_images = []
+    for img_data, metadata in page_images:
+        if metadata['encoding'] == 'boilerplate':
+            if skipped_images is not None:
+                skipped_images.append(metadata)
+            continue
         
-        # ARCHITECTURE V3.0 : Génération d'UID unique pour identifiant physique IMMUABLE
-        unique_id = str(uuid.uuid4())[:8]  # 8 premiers caractères de l'UUID
-        filename = f"{unique_id}.jpg"
-        filepath = os.path.join(output_folder, filename)
+        if metadata['encoding'] == 'prefiltered':
+            if prefiltered_images is not None:
+                prefiltered_images.append(metadata)
+            continue
         
-        # Sauvegarder l'image en JPEG
-        img_pil = Image.open(BytesIO(image_data))
-        if img_pil.mode in ('RGBA', 'LA', 'P'):
-            img_pil = img_pil.convert('RGB')
-        img_pil.save(filepath, 'JPEG', quality=95)
-        
-        extracted_files.append({
-            'filename': filename,  # UID unique (exemple: a1b2c3d4.jpg)
-            'uid': unique_id,      # UID pur pour référence
-            'path': filepath,
-            'section': section_number,       # Métadonnée : section détectée
-            'section_title': current_section['title'],  # Métadonnée : titre section
-            'page': metadata['page'],        # Métadonnée : numéro de page
-            'image_number': 1                # Métadonnée : sera calculée côté client
-        })
+        if 'reused_filename' in metadata:
+            staged_images.append((None, metadata))
+            continue
+        
+        xref = metadata['xref']
+        cache_entry = xref_cache.setdefault(xref, {'data': img_data, 'hash': None, 'encoding': metadata.get('encoding')})
+        
+        if cache_entry['hash'] is None and metadata.get('hash') is not None:
+            cache_entry['hash'] = metadata['hash']
+        
+        if isinstance(img_data, StagedImage):
+            # Xref déjà confié au staging (référence renvoyée par le cache)
+            staged = img_data
+        else:
+            if compute_hash and cache_entry['hash'] is None:
+                cache_entry['hash'] = calculate_image_hash(img_data)
+            staged = staging.stage(img_data, xref)
+            # Le cache ne retient plus les bytes, seulement l'image stagée
+            cache_entry['data'] = staged
+        
+        if compute_hash:
+            metadata['hash'] = cache_entry['hash']
+        metadata['size'] = staged.size
+        staged_images.append((staged, metadata))
+    
+    return staged_images
+
+def extract_images_from_pdf(pdf_path, output_folder, document_name, filter_duplicates=True, detect_hierarchy=True, workers=1, progress_callback=None, memory_budget=None, boilerplate_index=None, page_manifest_path=None, page_scans=None, image_filter=None, output_callback=None, pdf_sha256=None, source_filename=None):
+    """
+    Extrait les images du PDF en respectant la nomenclature
+    CRL-[NOM DU DOC]-X.X.X n_Y.jpg avec filtrage des images dupliquées
+    
+    Si workers > 1, les pages sont réparties entre plusieurs processus
+    (voir scan_pages et iter_pages_parallel) ; l'ordre des images reste identique.
+    
+    memory_budget (optionnel) : octets d'images conservés en mémoire avant déchargement
+    sur disque (voir ImageStaging). None = tout en mémoire.
+    
+    boilerplate_index (optionnel) : index persistant des images récurrentes entre documents.
+    Avec filter_duplicates, les images connues sont ignorées avant encodage et les
+    nouveaux groupes de doublons enrichissent l'index.
+    
+    page_manifest_path (optionnel) : manifeste des empreintes de pages du document. S'il existe
+    (révision précédente), les pages inchangées ne sont pas ré-extraites et leurs images gardent
+    leur UID ; il est ensuite réécrit pour la révision courante.
     
-    pdf_document.close()
+    page_scans (optionnel) : scans des pages déjà connus pour ce PDF (retraitement, voir
+    page_scan_from_manifest) ; les pages ne sont alors pas relues.
+    
+    image_filter (optionnel) : seuils du pré-filtrage (voir prefilter_image). Les images
+    trop petites et les masques sont écartés d'après les métadonnées de la page, avant
+    tout décodage ; leur nombre par motif figure dans 'prefiltered'. Le plafond de
+    résolution (voir get_downscale_size) s'applique au décodage ; les images réduites
+    ont leurs dimensions d'origine dans 'original_size' (original disponible via
+    extract_original_image).
+    
+    progress_callback (optionnel) : appelé avec (étape, courant, total, **compteurs) pour les
+    étapes 'sections', 'extraction' (pages), 'dedupe' et 'save' (images). Une exception levée
+    par le callback interrompt l'extraction (annulation d'un job).
+    
+    output_callback (optionnel) : appelé avec le chemin de chaque fichier créé dans le dossier
+    de sortie, avant son écriture (fichiers à supprimer si l'extraction est annulée).
+    
+    pdf_sha256 (optionnel) : empreinte du PDF si elle est déjà connue (calculée sinon) ;
+    identifie le document dans l'index des images récurrentes et le manifeste.
+    
+    source_filename (optionnel) : nom du fichier téléversé, enregistré dans le manifeste
+    (le PDF conservé porte son empreinte comme nom).
+    """
+    pdf_document = fitz.open(pdf_path)
+    
+    # Utiliser le nom de document fourni
+    clean_filename = document_name
+    
+    # Détecter les sections selon l'option
+    section_detection = {'strategy': 'default', 'duration': 0}
+    # Scan des pages (titres, images, emplacements) partagé avec l'extraction :
+    # rempli si le texte est analysé, sinon chaque page est scannée à l'extraction
+    page_scans = list(page_scans) if page_scans else []
+    if detect_hierarchy:
+        sections = detect_sections(pdf_document, progress_callback=progress_callback,
+                                   detection_info=section_detection, page_scans=page_scans,
+                                   workers=workers)
+    else:
+        # Créer des sections par défaut sans hiérarchie
+        total_pages = len(pdf_document)
+        pages_per_section = max(5, total_pages // 3)
+        sections = []
+        section_num = 1
+        
+        for start in range(1, total_pages + 1, pages_per_section):
+            end = min(start + pages_per_section - 1, total_pages)
+            sections.append({
+                'number': str(section_num),
+                'title': f'{section_num}. Section {section_num}',
+                'start_page': start,
+                'end_page': end,
+                'level': 1
+            })
+            section_num += 1
+    
+    # Index des plages de pages couvertes par chaque section
+    section_index = build_section_index(sections)
+    
+    # Extraction incrémentale : les empreintes de toutes les pages sont nécessaires
+    # avant l'extraction pour retrouver les pages inchangées
+    reused_pages = {}
+    if page_manifest_path:
+        if not page_scans:
+            page_scans = scan_pages(pdf_document, workers=workers)
+        previous_manifest = load_page_manifest(page_manifest_path)
+        # Les pages d'une extraction avec d'autres seuils de pré-filtrage ne sont pas réutilisables
+        if previous_manifest and previous_manifest['source'].get('image_filter') == image_filter:
+            reusable = ReusablePages(previous_manifest['pages'], require_hash=filter_duplicates)
+            for page_num, scan in enumerate(page_scans):
+                records = reusable.take(scan['fingerprint'])
+                if records is not None:
+                    reused_pages[page_num] = records
+            print(f"♻️  {len(reused_pages)}/{len(page_scans)} pages inchangées depuis la révision précédente")
+    
+    # Première passe : collecter toutes les images avec leurs métadonnées
+    # Cache des xrefs déjà décodés (logos/bandeaux répétés sur chaque page)
+    xref_cache = {}
+    # Les bytes sont confiés au staging dès le décodage : seuls le hash et les
+    # métadonnées restent en mémoire au-delà du budget
+    staging = ImageStaging(output_folder, memory_budget)
+    total_pages = len(pdf_document)
+    
+    # Images récurrentes connues d'autres documents (logos fournisseurs, tampons)
+    boilerplate_array = None
+    skipped_images = []
+    prefiltered_images = []
+    duplicate_hashes = []
+    if filter_duplicates and boilerplate_index is not None:
+        boilerplate_array = hashes_to_array(boilerplate_index.active_hashes())
+    
+    try:
+        all_images_data = []
+        
+        if workers and workers > 1 and total_pages >= PARALLEL_MIN_PAGES:
+            # Mode parallèle : chaque worker ouvre son propre document fitz
+            pdf_document.close()
+            pdf_document = None
+            previous_end = 0
+            for pages_done, page_images in iter_pages_parallel(pdf_path, total_pages, section_index, workers,
+                                                                  compute_hash=filter_duplicates,
+                                                                  boilerplate_array=boilerplate_array,
+                                                                  page_scans=page_scans,
+                                                                  skip_pages=set(reused_pages),
+                                                                  image_filter=image_filter):
+                # Réintégrer les pages réutilisées de la plage (tri stable : ordre de chaque page conservé)
+                for page_num in range(previous_end, pages_done):
+                    if page_num in reused_pages:
+                        page_images.extend(reuse_page_images(page_num, reused_pages[page_num], section_index,
+                                                             page_scans[page_num], boilerplate_array,
+                                                             output_folder, filter_duplicates))
+                page_images.sort(key=lambda item: item[1]['page'])
+                previous_end = pages_done
+                all_images_data.extend(stage_page_images(staging, page_images, xref_cache, filter_duplicates,
+                                                         skipped_images, prefiltered_images))
+                if progress_callback:
+                    progress_callback('extraction', pages_done, total_pages, images=len(all_images_data))
+        else:
+            for page_num in range(total_pages):
+                if progress_callback:
+                    progress_callback('extraction', page_num, total_pages, images=len(all_images_data))
+                if page_num in reused_pages:
+                    page_images = reuse_page_images(page_num, reused_pages[page_num], section_index,
+                                                    page_scans[page_num], boilerplate_array,
+                                                    output_folder, filter_duplicates)
+                else:
+                    page_images = extract_page_images(pdf_document, page_num, section_index, xref_cache,
+                                                      compute_hash=filter_duplicates,
+                                                      boilerplate_array=boilerplate_array,
+                                                      page_scan=page_scans[page_num] if page_scans else None,
+                                                      image_filter=image_filter)
+                all_images_data.extend(stage_page_images(staging, page_images, xref_cache, filter_duplicates,
+                                                         skipped_images, prefiltered_images))
+            if progress_callback:
+                progress_callback('extraction', total_pages, total_pages, images=len(all_images_data))
+        
+        if skipped_images:
+            print(f"🚫 {len(skipped_images)} images récurrentes connues ignorées")
+        prefiltered = Counter(metadata['prefilter'] for metadata in prefiltered_images)
+        if prefiltered_images:
+            print(f"🪶 {len(prefiltered_images)} images ignorées avant décodage "
+                  f"({', '.join(f'{reason}: {count}' for reason, count in sorted(prefiltered.items()))})")
+        
+        if staging.spilled_count:
+            print(f"💾 {staging.spilled_count} images déchargées sur disque ({staging.spilled_bytes // 1024} Ko), "
+                  f"{staging.memory_bytes // 1024} Ko en mémoire")
+        
+        # Filtrer les images dupliquées selon l'option
+        if filter_duplicates:
+            filtered_images = filter_duplicate_images(all_images_data, min_occurrences=4, xref_cache=xref_cache,
+                                                      progress_callback=progress_callback,
+                                                      duplicate_hashes=duplicate_hashes)
+        else:
+            filtered_images = all_images_data
+            print(f"🔍 Filtrage désactivé - {len(filtered_images)} images conservées")
+        
+        # Deuxième passe : sauvegarder les images filtrées avec UIDs uniques
+        extracted_files = []
+        reused_files = 0
+        # Dernière utilisation de chaque image : le fichier de staging peut y être déplacé
+        last_use = {id(staged): index for index, (staged, _) in enumerate(filtered_images)}
+        
+        for image_index, (staged, metadata) in enumerate(filtered_images):
+            if progress_callback:
+                progress_callback('save', image_index, len(filtered_images), files_written=image_index)
+            
+            current_section = metadata['section']
+            section_number = current_section['number']
+            
+            reused_filename = metadata.get('reused_filename')
+            if reused_filename and os.path.exists(os.path.join(output_folder, reused_filename)):
+                # Image d'une page inchangée : le fichier et son UID sont conservés
+                filename = reused_filename
+                unique_id = os.path.splitext(filename)[0]
+                filepath = os.path.join(output_folder, filename)
+                reused_files += 1
+            else:
+                # ARCHITECTURE V3.0 : Génération d'UID unique pour identifiant physique IMMUABLE
+                unique_id = str(uuid.uuid4())[:8]  # 8 premiers caractères de l'UUID
+                filename = f"{unique_id}.jpg"
+                filepath = os.path.join(output_folder, filename)
+                
+                if staged is None:
+                    # Page inchangée mais aucun fichier conservé (image filtrée dans la révision
+                    # précédente) : décodage de cette seule image
+                    if pdf_document is None:
+                        pdf_document = fitz.open(pdf_path)
+                    img_data, metadata['encoding'], _ = decode_image_xref(pdf_document, metadata['xref'],
+                                                                          image_filter=image_filter)
+                    if metadata['encoding'] == 'downscaled':
+                        img = page_scans[metadata['page'] - 1]['images'][metadata['img_index']]
+                        metadata['original_size'] = (img[2], img[3])
+                    if output_callback:
+                        output_callback(filepath)
+                    with open(filepath, 'wb') as f:
+                        f.write(img_data)
+                else:
+                    # Sauvegarder l'image : les bytes sont déjà au format JPEG final
+                    if output_callback:
+                        output_callback(filepath)
+                    staged.write_to(filepath, move=last_use[id(staged)] == image_index)
+            metadata['filename'] = filename
+            
+            extracted_files.append({
+                'filename': filename,  # UID unique (exemple: a1b2c3d4.jpg)
+                'uid': unique_id,      # UID pur pour référence
+                'path': filepath,
+                'section': section_number,       # Métadonnée : section détectée
+                'section_title': current_section['title'],  # Métadonnée : titre section
+                'page': metadata['page'],        # Métadonnée : numéro de page
+                'bbox': metadata.get('bbox'),    # Métadonnée : emplacement sur la page
+                'original_size': metadata.get('original_size'),  # Dimensions d'origine si l'image a été réduite
+                'image_number': 1                # Métadonnée : sera calculée côté client
+            })
+        
+        if progress_callback:
+            progress_callback('save', len(filtered_images), len(filtered_images), files_written=len(extracted_files))
+        
+        # Enrichir l'index des images récurrentes
+        if pdf_sha256 is None and (boilerplate_array is not None or page_manifest_path):
+            pdf_sha256 = compute_file_sha256(pdf_path)
+        if boilerplate_array is not None:
+            boilerplate_index.record_document(pdf_sha256, document_name, duplicate_hashes,
+                                              [metadata['hash'] for metadata in skipped_images])
+        
+        # Manifeste de la révision courante (pages et images produites par chaque page)
+        if page_manifest_path:
+            records_by_page = defaultdict(list)
+            for metadata in [metadata for _, metadata in all_images_data] + skipped_images + prefiltered_images:
+                records_by_page[metadata['page']].append(make_image_record(metadata))
+            save_page_manifest(page_manifest_path, [
+                make_manifest_page(scan, records_by_page[page_num + 1])
+                for page_num, scan in enumerate(page_scans)
+            ], source={
+                'pdf_path': pdf_path,
+                'pdf_sha256': pdf_sha256,
+                'source_filename': source_filename or os.path.basename(pdf_path),
+                'filter_duplicates': filter_duplicates,
+                'detect_hierarchy': detect_hierarchy,
+                'image_filter': image_filter
+            })
+    
+    finally:
+        staging.cleanup()
+        if pdf_document is not None:
+            pdf_document.close()
     
     return {
         'sections': sections,
         'extracted_files': extracted_files,
         'total_images': len(extracted_files),
-        'filtered_count': len(all_images_data) - len(filtered_images)
+        'filtered_count': len(all_images_data) - len(filtered_images),
+        'passthrough_count': sum(1 for _, metadata in filtered_images if metadata.get('encoding') == 'passthrough'),
+        'downscaled_count': sum(1 for _, metadata in filtered_images if metadata.get('encoding') == 'downscaled'),
+        'spilled_count': staging.spilled_count,
+        'boilerplate_skipped': len(skipped_images),
+        'prefiltered_count': len(prefiltered_images),
+        'prefiltered': dict(prefiltered),
+        'section_detection': section_detection,
+        'pages_reused': len(reused_pages),
+        'files_reused': reused_files
     }
 
+def get_image_version(image_path):
+    """
+    Version d'un fichier image pour les URLs /image/...?v= : change à chaque
+    remplacement du fichier (image éditée), ce qui invalide le cache navigateur
+    """
+    return f"{os.stat(image_path).st_mtime_ns:x}"
+
+def set_image_cache_headers(response, image_path):
+    """
+    Cache navigateur d'une image ou d'un de ses dérivés : immutable si l'URL porte
+    la version actuelle de l'image (?v=), revalidation par ETag sinon
+    """
+    version = request.args.get('v')
+    if version and version == get_image_version(image_path):
+        response.headers['Cache-Control'] = f'public, max-age={IMAGE_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/image/<path:folder_name>/<path:filename>')
 def serve_image(folder_name, filename):
-    """Servir les images extraites pour le preview"""
+    """
+    Servir les images extraites pour le preview
+    
+    Les images portent un UID immuable. Demandée avec ?v= égal à sa version actuelle
+    (voir get_image_version), une image est mise en cache sans revalidation
+    (immutable). Sinon (pas de version, ou image remplacée depuis), le navigateur
+    revalide avec l'ETag et reçoit 304 si l'image n'a pas changé.
+    """
     try:
-        image_path = os.path.join(app.config['OUTPUT_FOLDER'], folder_name, filename)
-        print(f"🖼️  Tentative de servir l'image: {image_path}")
-        
-        if os.path.exists(image_path):
-            print(f"✅ Image trouvée: {image_path}")
-            # Déterminer le type MIME basé sur l'extension
-            if filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
-                mimetype = 'image/jpeg'
-            elif filename.lower().endswith('.png'):
-                mimetype = 'image/png'
-            else:
-                mimetype = 'image/jpeg'  # Par défaut
-            
-            return send_file(image_path, mimetype=mimetype)
-        else:
-            print(f"❌ Image non trouvée: {image_path}")
-            
-            # Lister les fichiers disponibles dans le dossier pour debug
-            folder_path = os.path.join(app.config['OUTPUT_FOLDER'], folder_name)
-            if os.path.exists(folder_path):
-                available_files = os.listdir(folder_path)
-                print(f"📁 Fichiers disponibles dans {folder_path}: {available_files}")
-            else:
-                print(f"📁 Dossier non trouvé: {folder_path}")
-            
-            # Retourner une erreur 404
+        folder_path = os.path.join(app.config['OUTPUT_FOLDER'], folder_name)
+        mimetype = 'image/png' if filename.lower().endswith('.png') else 'image/jpeg'
+        try:
+            response = send_from_directory(folder_path, filename, mimetype=mimetype, etag=True, conditional=True)
+        except NotFound:
             return "Image non trouvée", 404
+        
+        return set_image_cache_headers(response, os.path.join(folder_path, filename))
             
     except Exception as e:
         print(f"💥 Erreur lors du service de l'image {filename}: {str(e)}")
         return "Erreur serveur", 500
 
+@app.route('/thumbnail/<path:folder_name>/<path:filename>')
+def serve_thumbnail(folder_name, filename):
+    """
+    Miniature ou aperçu d'une image extraite, bornée en largeur
+    
+    Paramètres : w (largeur en pixels, arrondie à une largeur proposée, 480 par défaut),
+    format ('jpeg' ou 'webp') et v (version de l'image, voir serve_image).
+    Sans format, WebP est servi aux navigateurs qui l'annoncent dans Accept, JPEG aux
+    autres (réponse marquée Vary: Accept). Le dérivé est généré à la première demande
+    puis servi depuis le cache disque ; il est régénéré quand l'image est éditée.
+    """
+    image_format = request.args.get('format')
+    negotiated = image_format is None
+    if negotiated:
+        accepts_webp = any(value == 'image/webp' and quality > 0
+                           for value, quality in request.accept_mimetypes)
+        image_format = 'webp' if accepts_webp else 'jpeg'
+    image_format = image_format.lower()
+    if image_format not in THUMBNAIL_FORMATS:
+        return "Format non supporté", 400
+    try:
+        width = normalize_thumbnail_width(int(request.args.get('w', 480)))
+    except ValueError:
+        return "Largeur invalide", 400
+    
+    image_path = safe_join(app.config['OUTPUT_FOLDER'], folder_name, filename)
+    if image_path is None or not os.path.isfile(image_path):
+        return "Image non trouvée", 404
+    
+    try:
+        with get_app_thumbnail_cache().serve(folder_name, image_path, width, image_format) as thumbnail_path:
+            # ETag (nom du dérivé, format compris) et date tirés de l'image source :
+            # le fichier du dérivé est retouché à chaque accès (LRU)
+            response = send_file(thumbnail_path, mimetype=f'image/{image_format}', conditional=True,
+                                 etag=os.path.basename(thumbnail_path),
+                                 last_modified=os.path.getmtime(image_path))
+            if negotiated:
+                response.vary.add('Accept')
+    except Exception as e:
+        print(f"💥 Erreur lors de la génération de la miniature {filename}: {str(e)}")
+        return "Erreur serveur", 500
+    
+    return set_image_cache_headers(response, image_path)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -658,6 +1940,141 @@ def debug_appstate():
     """Route pour debugger la structure appState"""
     return send_file('debug_appstate.html')
 
+def prepare_extraction(file):
+    """
+    Enregistre le PDF uploadé et prépare les paramètres d'extraction
+    à partir du formulaire (nom du document, options, dossier de sortie)
+    """
+    filename = secure_filename(file.filename)
+    
+    # S'assurer que le dossier d'upload existe
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    # PDF conservé sous son empreinte (retraitement, originaux) : un autre upload
+    # portant le même nom de fichier ne le remplace pas
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.pdf', dir=app.config['UPLOAD_FOLDER'])
+    os.close(fd)
+    try:
+        file.save(tmp_path)
+        pdf_sha256 = compute_file_sha256(tmp_path)
+        filepath = get_source_pdf_path(pdf_sha256)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    # Récupérer le nom du document configuré par l'utilisateur
+    document_name = request.form.get('document_name', '').strip()
+    print(f"🔍 DEBUG: document_name reçu du formulaire: '{document_name}'")
+    print(f"🔍 DEBUG: request.form complet: {dict(request.form)}")
+    
+    if not document_name:
+        # Si pas de nom configuré, utiliser le nom du fichier sans extension
+        document_name = os.path.splitext(filename)[0]
+        print(f"🔍 DEBUG: document_name par défaut (nom fichier): '{document_name}'")
+    
+    # Nettoyer le nom du document (seulement lettres, chiffres, tirets, underscores)
+    clean_document_name = re.sub(r'[^\w\-_]', '_', document_name)
+    print(f"🔍 DEBUG: clean_document_name final: '{clean_document_name}'")
+    
+    # Dossier de sortie spécifique pour ce fichier (créé au lancement de l'extraction)
+    output_subfolder = os.path.join(
+        app.config['OUTPUT_FOLDER'], 
+        clean_document_name
+    )
+    
+    return {
+        'filepath': filepath,
+        'filename': filename,
+        'pdf_sha256': pdf_sha256,
+        'document_name': clean_document_name,
+        'output_folder': output_subfolder,
+        # Récupérer les options
+        'filter_duplicates': request.form.get('filter_duplicates') == 'on',
+        'detect_hierarchy': request.form.get('detect_hierarchy') == 'on'
+    }
+
+def run_extraction(extraction, progress_callback=None, output_callback=None):
+    """
+    Exécute l'extraction préparée par prepare_extraction et complète le résultat pour l'affichage
+    
+    Un PDF déjà traité avec les mêmes options (même contenu, quel que soit le nom du
+    document) est servi depuis le cache d'extraction sans être retraité ; le manifeste des
+    pages enregistré avec l'entrée devient celui du document (retraitement, originaux).
+    Avec le filtrage des doublons, la clé inclut aussi les images récurrentes actives de l'index.
+    
+    Clés optionnelles de extraction : 'pdf_sha256' (empreinte déjà calculée) et
+    'page_scans' (scans des pages issus du manifeste, retraitement).
+    """
+    # Créer le dossier de sortie
+    os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)  # S'assurer que le dossier parent existe
+    os.makedirs(extraction['output_folder'], exist_ok=True)
+    
+    cache = get_app_extraction_cache()
+    pdf_sha256 = extraction.get('pdf_sha256') or compute_file_sha256(extraction['filepath'])
+    image_filter = get_app_image_filter()
+    boilerplate_index = get_app_boilerplate_index()
+    cache_options = {
+        'filter_duplicates': extraction['filter_duplicates'],
+        'detect_hierarchy': extraction['detect_hierarchy'],
+        'image_filter': image_filter
+    }
+    if extraction['filter_duplicates']:
+        # Le résultat dépend des images récurrentes connues au moment de l'extraction
+        cache_options['boilerplate'] = boilerplate_index.active_digest()
+    cache_key = cache.make_key(pdf_sha256, cache_options)
+    
+    page_manifest_path = get_page_manifest_path(extraction['document_name'])
+    result = cache.get(cache_key, extraction['output_folder'], output_callback=output_callback,
+                       manifest_path=page_manifest_path)
+    if result is not None:
+        print(f"⚡ PDF déjà traité avec ces options : {len(result['extracted_files'])} images servies depuis le cache")
+        result['cache_hit'] = True
+        update_manifest_source(page_manifest_path, source_filename=extraction['filename'])
+        if progress_callback:
+            files_count = len(result['extracted_files'])
+            progress_callback('save', files_count, files_count, files_written=files_count, cached=True)
+    else:
+        # Extraire les images avec le nom configuré
+        result = extract_images_from_pdf(
+            extraction['filepath'], 
+            extraction['output_folder'], 
+            document_name=extraction['document_name'],
+            filter_duplicates=extraction['filter_duplicates'],
+            detect_hierarchy=extraction['detect_hierarchy'],
+            workers=app.config['EXTRACTION_WORKERS'],
+            memory_budget=app.config['EXTRACTION_MEMORY_BUDGET'],
+            boilerplate_index=boilerplate_index,
+            page_manifest_path=page_manifest_path,
+            page_scans=extraction.get('page_scans'),
+            image_filter=image_filter,
+            progress_callback=progress_callback,
+            output_callback=output_callback,
+            pdf_sha256=pdf_sha256,
+            source_filename=extraction['filename']
+        )
+        cache.put(cache_key, result, manifest_path=page_manifest_path)
+        result['cache_hit'] = False
+    
+    # Version de chaque fichier pour le cache navigateur des images (voir serve_image)
+    for file_info in result['extracted_files']:
+        file_info['version'] = get_image_version(file_info['path'])
+    
+    # Ajouter des statistiques pour l'affichage
+    result['source_filename'] = extraction['filename']
+    result['document_name'] = extraction['document_name']
+    result['output_folder_name'] = extraction['document_name']
+    
+    # Debug des chemins
+    print(f"Fichier source: {extraction['filename']}")
+    print(f"Nom du document: {extraction['document_name']}")
+    print(f"Dossier de sortie: {extraction['output_folder']}")
+    print(f"Images extraites: {len(result['extracted_files'])}")
+    print(f"🔍 DEBUG: result['document_name'] envoyé au template: '{result['document_name']}'")
+    
+    return result
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -670,66 +2087,14 @@ def upload_file():
         return redirect(request.url)
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        
-        # S'assurer que le dossier d'upload existe
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Récupérer le nom du document configuré par l'utilisateur
-        document_name = request.form.get('document_name', '').strip()
-        print(f"🔍 DEBUG: document_name reçu du formulaire: '{document_name}'")
-        print(f"🔍 DEBUG: request.form complet: {dict(request.form)}")
-        
-        if not document_name:
-            # Si pas de nom configuré, utiliser le nom du fichier sans extension
-            document_name = os.path.splitext(filename)[0]
-            print(f"🔍 DEBUG: document_name par défaut (nom fichier): '{document_name}'")
-        
-        # Nettoyer le nom du document (seulement lettres, chiffres, tirets, underscores)
-        clean_document_name = re.sub(r'[^\w\-_]', '_', document_name)
-        print(f"🔍 DEBUG: clean_document_name final: '{clean_document_name}'")
-        
-        # Récupérer les options
-        filter_duplicates = request.form.get('filter_duplicates') == 'on'
-        detect_hierarchy = request.form.get('detect_hierarchy') == 'on'
-        
         try:
-            # Créer un dossier de sortie spécifique pour ce fichier
-            os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)  # S'assurer que le dossier parent existe
-            output_subfolder = os.path.join(
-                app.config['OUTPUT_FOLDER'], 
-                clean_document_name
-            )
-            os.makedirs(output_subfolder, exist_ok=True)
-            
-            # Extraire les images avec le nom configuré
-            result = extract_images_from_pdf(
-                filepath, 
-                output_subfolder, 
-                document_name=clean_document_name,
-                filter_duplicates=filter_duplicates,
-                detect_hierarchy=detect_hierarchy
-            )
-            
-            # Ajouter des statistiques pour l'affichage
-            result['source_filename'] = filename
-            result['document_name'] = clean_document_name
-            result['output_folder_name'] = clean_document_name
-            
-            # Debug des chemins
-            print(f"Fichier source: {filename}")
-            print(f"Nom du document: {clean_document_name}")
-            print(f"Dossier de sortie: {output_subfolder}")
-            print(f"Images extraites: {len(result['extracted_files'])}")
-            print(f"🔍 DEBUG: result['document_name'] envoyé au template: '{result['document_name']}'")
+            extraction = prepare_extraction(file)
+            result = run_extraction(extraction)
             
             return render_template('results.html', 
                                  result=result, 
-                                 source_filename=filename,
-                                 output_folder=output_subfolder)
+                                 source_filename=extraction['filename'],
+                                 output_folder=extraction['output_folder'])
         
         except Exception as e:
             flash(f'Erreur lors du traitement: {str(e)}')
@@ -738,6 +2103,248 @@ def upload_file():
         flash('Type de fichier non autorisé. Seuls les fichiers PDF sont acceptés.')
         return redirect(url_for('index'))
 
+@app.route('/api/jobs', methods=['POST'])
+def create_extraction_job():
+    """Lance l'extraction en arrière-plan et retourne immédiatement l'identifiant du job"""
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({'error': 'Aucun fichier sélectionné'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Type de fichier non autorisé. Seuls les fichiers PDF sont acceptés.'}), 400
+    
+    try:
+        extraction = prepare_extraction(file)
+        job = get_job_manager(app.config['JOB_WORKERS']).submit(
+            run_extraction, extraction['output_folder'], extraction
+        )
+        
+        return jsonify({
+            'job_id': job.job_id,
+            'status_url': url_for('extraction_job_status', job_id=job.job_id),
+            'events_url': url_for('extraction_job_events', job_id=job.job_id),
+            'cancel_url': url_for('cancel_extraction_job', job_id=job.job_id),
+            'results_url': url_for('extraction_job_results', job_id=job.job_id)
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors du traitement: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>')
+def extraction_job_status(job_id):
+    """Statut d'un job d'extraction : étape en cours et progression"""
+    job = get_job_manager(app.config['JOB_WORKERS']).get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events')
+def extraction_job_events(job_id):
+    """Flux Server-Sent Events de la progression d'un job (pages, images, doublons, fichiers)"""
+    job = get_job_manager(app.config['JOB_WORKERS']).get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    
+    # Reprise après reconnexion du navigateur
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+    
+    def generate():
+        after_id = last_event_id
+        while True:
+            events = job.wait_for_events(after_id, timeout=SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if job.is_finished():
+                    # Événement final déjà consommé ou sorti du tampon
+                    yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+                    return
+                yield ": keepalive\n\n"
+                continue
+            
+            for event in events:
+                after_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                if event['event'] == 'status' and event['data']['status'] in ('completed', 'failed', 'cancelled'):
+                    return
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Désactiver le buffering des proxies (nginx)
+    })
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_extraction_job(job_id):
+    """Annule un job d'extraction et nettoie son dossier de sortie"""
+    job = get_job_manager(app.config['JOB_WORKERS']).cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job introuvable'}), 404
+    
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/results')
+def extraction_job_results(job_id):
+    """Affiche les résultats d'un job d'extraction terminé"""
+    job = get_job_manager(app.config['JOB_WORKERS']).get(job_id)
+    if job is None or job.status != 'completed':
+        flash('Extraction introuvable ou non terminée')
+        return redirect(url_for('index'))
+    
+    return render_template('results.html', 
+                         result=job.result, 
+                         source_filename=job.result['source_filename'],
+                         output_folder=job.output_folder)
+
+def load_document_source(document_name):
+    """
+    Charge le manifeste d'un document déjà extrait et vérifie que son PDF source est intact
+    
+    Returns:
+        tuple: (manifeste, SHA-256 du PDF, None) ou (None, None, réponse d'erreur 404/409)
+    """
+    manifest = load_page_manifest(get_page_manifest_path(document_name))
+    if manifest is None:
+        return None, None, (jsonify({'error': 'Document introuvable ou jamais extrait'}), 404)
+    
+    pdf_path = manifest['source'].get('pdf_path')
+    if not pdf_path or not os.path.exists(pdf_path):
+        return None, None, (jsonify({'error': 'PDF source introuvable, veuillez le téléverser à nouveau'}), 409)
+    pdf_sha256 = compute_file_sha256(pdf_path)
+    if pdf_sha256 != manifest['source'].get('pdf_sha256'):
+        return None, None, (jsonify({'error': 'PDF source remplacé depuis l\'extraction, veuillez le téléverser à nouveau'}), 409)
+    
+    return manifest, pdf_sha256, None
+
+def extract_original_image(pdf_path, xref):
+    """
+    Décode une image du PDF en pleine résolution (sans plafond), à la demande
+    
+    Returns:
+        bytes: Image JPEG
+    """
+    pdf_document = fitz.open(pdf_path)
+    try:
+        img_data, _, _ = decode_image_xref(pdf_document, xref)
+        return img_data
+    finally:
+        pdf_document.close()
+
+@app.route('/api/documents/<document_name>/reprocess', methods=['POST'])
+def reprocess_document(document_name):
+    """
+    Relance l'extraction d'un document déjà traité avec de nouvelles options
+    
+    Corps JSON : {"filter_duplicates": bool, "detect_hierarchy": bool} (options précédentes
+    par défaut). Le PDF conservé, les titres candidats et les enregistrements d'images du
+    manifeste sont réutilisés : seules la détection des sections, l'assignation et le
+    filtrage des doublons sont rejoués.
+    """
+    document_name = re.sub(r'[^\w\-_]', '_', document_name)
+    manifest, pdf_sha256, error = load_document_source(document_name)
+    if error:
+        return error
+    
+    source = manifest['source']
+    pdf_path = source['pdf_path']
+    data = request.get_json(silent=True) or {}
+    extraction = {
+        'filepath': pdf_path,
+        'filename': source.get('source_filename') or os.path.basename(pdf_path),
+        'document_name': document_name,
+        'output_folder': os.path.join(app.config['OUTPUT_FOLDER'], document_name),
+        'filter_duplicates': bool(data.get('filter_duplicates', source.get('filter_duplicates', True))),
+        'detect_hierarchy': bool(data.get('detect_hierarchy', source.get('detect_hierarchy', True))),
+        'pdf_sha256': pdf_sha256,
+        'page_scans': [page_scan_from_manifest(page) for page in manifest['pages']]
+    }
+    
+    try:
+        result = run_extraction(extraction)
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors du retraitement: {str(e)}'}), 500
+    
+    return jsonify({
+        'success': True,
+        'document_name': document_name,
+        'options': {
+            'filter_duplicates': extraction['filter_duplicates'],
+            'detect_hierarchy': extraction['detect_hierarchy']
+        },
+        'result': result
+    })
+
+@app.route('/api/documents/<document_name>/images/<filename>/original')
+def download_original_image(document_name, filename):
+    """
+    Image en pleine résolution, redécodée depuis le PDF conservé
+    
+    Les images réduites à l'extraction (plafond de résolution) n'ont que leur version
+    réduite sur disque ; l'original est décodé à la demande et n'est pas conservé.
+    """
+    document_name = re.sub(r'[^\w\-_]', '_', document_name)
+    filename = secure_filename(filename)
+    manifest, _, error = load_document_source(document_name)
+    if error:
+        return error
+    
+    record = next((record for page in manifest['pages'] for record in page['records']
+                   if record['filename'] == filename), None)
+    if record is None or record.get('xref') is None:
+        return jsonify({'error': 'Image introuvable'}), 404
+    
+    try:
+        img_data = extract_original_image(manifest['source']['pdf_path'], record['xref'])
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors du décodage de l\'original: {str(e)}'}), 500
+    
+    return send_file(BytesIO(img_data), mimetype='image/jpeg',
+                     download_name=f"{os.path.splitext(filename)[0]}_original.jpg")
+
+@app.route('/api/admin/boilerplate')
+def list_boilerplate_entries():
+    """Liste les images récurrentes connues (index persistant entre documents)"""
+    index = get_app_boilerplate_index()
+    entries = index.list_entries()
+    return jsonify({
+        'entries': entries,
+        'total': len(entries),
+        'active': len([e for e in entries if e['active']]),
+        'min_documents': index.min_documents
+    })
+
+@app.route('/api/admin/boilerplate/<entry_id>/pin', methods=['POST'])
+def pin_boilerplate_entry(entry_id):
+    """Épingle (ou désépingle avec {"pinned": false}) une image récurrente"""
+    data = request.get_json(silent=True) or {}
+    entry = get_app_boilerplate_index().pin(entry_id, pinned=bool(data.get('pinned', True)))
+    if entry is None:
+        return jsonify({'error': 'Entrée introuvable'}), 404
+    
+    return jsonify({'success': True, 'entry': entry})
+
+@app.route('/api/admin/boilerplate/<entry_id>', methods=['DELETE'])
+def evict_boilerplate_entry(entry_id):
+    """Retire une image récurrente de l'index"""
+    if not get_app_boilerplate_index().evict(entry_id):
+        return jsonify({'error': 'Entrée introuvable'}), 404
+    
+    return jsonify({'success': True, 'id': entry_id})
+
+def zip_stream_response(entries, download_name):
+    """
+    Réponse ZIP envoyée au client au fur et à mesure de sa production (voir iter_zip_stream)
+    
+    Args:
+        entries (iterable): Tuples (chemin du fichier source, nom dans l'archive)
+        download_name (str): Nom du fichier téléchargé
+    """
+    response = Response(iter_zip_stream(entries, workers=app.config['EXPORT_COMPRESSION_WORKERS']),
+                        mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
 @app.route('/download/<path:folder_name>')
 def download_zip(folder_name):
     """Télécharger toutes les images extraites dans un fichier ZIP"""
@@ -747,24 +2354,8 @@ def download_zip(folder_name):
         flash('Dossier non trouvé')
         return redirect(url_for('index'))
     
-    # Créer un fichier ZIP en mémoire
-    memory_file = BytesIO()
-    
-    with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, folder_path)
-                zf.write(file_path, arcname)
-    
-    memory_file.seek(0)
-    
-    return send_file(
-        memory_file,
-        as_attachment=True,
-        download_name=f'{folder_name}_images.zip',
-        mimetype='application/zip'
-    )
+    # ZIP produit en flux pendant l'envoi
+    return zip_stream_response(walk_folder_entries(folder_path), f'{folder_name}_images.zip')
 
 @app.route('/api/images/<path:folder_name>')
 def get_images_json(folder_name):
@@ -794,57 +2385,85 @@ def export_custom():
     """Export personnalisé basé sur la configuration utilisateur"""
     try:
         config = request.get_json()
-        
-        # Créer un dossier temporaire pour l'export
-        import tempfile
-        import shutil
-        
-        with tempfile.TemporaryDirectory() as temp_dir:
-            document_folder = os.path.join(app.config['OUTPUT_FOLDER'], config['documentName'])
-            
-            # Traiter chaque section
-            for section in config['sections']:
-                for image_config in section['images']:
-                    # Utiliser le nom de fichier actuel sur le disque
-                    current_physical_filename = image_config['originalFilename']
-                    # Nom souhaité pour le fichier dans le ZIP (déjà correctement formaté par le client)
-                    filename_in_zip = image_config['newFilename']
-                    
-                    current_physical_path = os.path.join(document_folder, current_physical_filename)
-                    
-                    if os.path.exists(current_physical_path):
-                        print(f"[Export] Copie: '{current_physical_path}' -> vers ZIP sous nom: '{filename_in_zip}'")
-                        path_in_zip = os.path.join(temp_dir, filename_in_zip)
-                        
-                        # S'assurer que le dossier parent existe dans temp_dir si filename_in_zip contient des sous-dossiers (peu probable ici)
-                        # os.makedirs(os.path.dirname(path_in_zip), exist_ok=True)
-                        
-                        shutil.copy2(current_physical_path, path_in_zip)
-                    else:
-                        print(f"[Export] ⚠️ Fichier source non trouvé, ignoré: {current_physical_path}")
-            
-            # Créer le ZIP
-            memory_file = BytesIO()
-            with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        zf.write(file_path, arcname)
-            
-            memory_file.seek(0)
-            
-            return send_file(
-                memory_file,
-                as_attachment=True,
-                download_name=f'{config["documentName"]}_custom.zip',
-                mimetype='application/zip'
-            )
+        document_folder = os.path.join(app.config['OUTPUT_FOLDER'], config['documentName'])
+        
+        # Fichiers à archiver, lus directement dans le dossier du document
+        # (un même nom dans le ZIP désigne la dernière image configurée sous ce nom)
+        entries = {}
+        for section in config['sections']:
+            for image_config in section['images']:
+                # Utiliser le nom de fichier actuel sur le disque
+                current_physical_filename = image_config['originalFilename']
+                # Nom souhaité pour le fichier dans le ZIP (déjà correctement formaté par le client)
+                filename_in_zip = os.path.normpath(image_config['newFilename']).lstrip('/\\')
+                if filename_in_zip.startswith('..'):
+                    print(f"[Export] ⚠️ Nom invalide dans le ZIP, ignoré: {image_config['newFilename']}")
+                    continue
+                
+                current_physical_path = os.path.join(document_folder, current_physical_filename)
+                
+                if os.path.exists(current_physical_path):
+                    entries[filename_in_zip] = current_physical_path
+                else:
+                    print(f"[Export] ⚠️ Fichier source non trouvé, ignoré: {current_physical_path}")
+        
+        # Archive déjà construite pour cette configuration et ces images : servie telle quelle
+        entries = [(source_path, arcname) for arcname, source_path in entries.items()]
+        store = get_app_export_store()
+        key = store.make_key(entries)
+        download_name = f'{config["documentName"]}_custom.zip'
+        artifact_path = store.get_path(key)
+        if artifact_path is not None:
+            print(f"[Export] ♻️ Archive déjà construite pour cette configuration ({key[:12]})")
+            return send_export_artifact(artifact_path, key, download_name)
+        
+        # Première demande : archive construite en arrière-plan et envoyée en flux au fil de
+        # sa construction. Elle est terminée et conservée même si le client se déconnecte :
+        # un téléchargement interrompu reprend sur Content-Location (Range)
+        build = store.start_build(key, entries)
+        if build is None:
+            return send_export_artifact(store.get_path(key), key, download_name)
+        print(f"[Export] Construction de l'archive ({len(entries)} images)")
+        response = Response(build.follow(), mimetype='application/zip')
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.set_etag(key)
+        response.headers['Content-Location'] = url_for('download_export_artifact', key=key,
+                                                       download_name=download_name)
+        return response
     
     except Exception as e:
         print(f"Erreur lors de l'export personnalisé: {e}")
         return jsonify({'error': str(e)}), 500
 
+def send_export_artifact(artifact_path, key, download_name):
+    """
+    Envoie une archive d'export avec son ETag (clé de l'archive)
+    
+    Content-Location indique l'URL GET de l'archive : requêtes conditionnelles
+    (If-None-Match) et reprise d'un téléchargement interrompu (Range).
+    """
+    response = send_file(artifact_path, mimetype='application/zip', as_attachment=True,
+                         download_name=download_name, etag=key, conditional=True)
+    response.headers['Content-Location'] = url_for('download_export_artifact', key=key,
+                                                   download_name=download_name)
+    return response
+
+@app.route('/exports/<key>/<download_name>')
+def download_export_artifact(key, download_name):
+    """Télécharge une archive d'export déjà construite (Range et requêtes conditionnelles)"""
+    if not re.fullmatch(r'[0-9a-f]{64}', key):
+        return jsonify({'error': 'Archive introuvable'}), 404
+    store = get_app_export_store()
+    artifact_path = store.get_path(key)
+    build = store.get_build(key) if artifact_path is None else None
+    if build is not None:
+        # Reprise pendant la construction : l'archive complète est servie (Range) dès qu'elle est prête
+        build.wait()
+        artifact_path = store.get_path(key)
+    if artifact_path is None:
+        return jsonify({'error': 'Archive expirée, veuillez relancer l\'export'}), 404
+    return send_export_artifact(artifact_path, key, secure_filename(download_name))
+
 @app.route('/api/save-edited-image', methods=['POST'])
 def save_edited_image():
     """Sauvegarde une image éditée"""
@@ -918,6 +2537,7 @@ def save_edited_image():
         return jsonify({
             'success': True,
             'filename': result_filename,
+            'version': get_image_version(os.path.join(document_folder, result_filename)),
             'original_filename': original_filename,
             'replace_original': replace_original,
             'message': 'Image sauvegardée avec succès'
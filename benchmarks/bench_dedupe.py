@@ -0,0 +1,86 @@
+"""
+Benchmark du regroupement des images quasi-dupliquées (filter_duplicate_images)
+
+Compare l'index multi-bandes (group_similar_hashes) au regroupement par paires
+vectorisé sur des hashs synthétiques : logos répétés, variantes bruitées et
+images uniques. Vérifie que les groupes produits sont identiques.
+
+Usage :
+    python benchmarks/bench_dedupe.py [--sizes 1000 10000 50000] [--pairwise-max 10000]
+"""
+import os
+import sys
+import io
+import time
+import random
+import argparse
+import contextlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+
+def make_hashes(count, seed=0):
+    """Génère des hashs proches de ceux d'un catalogue : ~30% de répétitions bruitées"""
+    rng = random.Random(seed)
+    logos = [rng.getrandbits(app.HASH_BITS) for _ in range(max(1, count // 200))]
+    hashes = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            # Répétition d'un logo avec quelques bits différents (compression, rendu)
+            value = rng.choice(logos)
+            for bit in rng.sample(range(app.HASH_BITS), rng.randint(0, 12)):
+                value ^= 1 << bit
+        else:
+            value = rng.getrandbits(app.HASH_BITS)
+        hashes.append(value)
+    return hashes
+
+
+def group_pairwise(hash_array, threshold=app.SIMILARITY_THRESHOLD):
+    """Regroupement par paires de référence (comparaison de chaque hash avec les suivants)"""
+    processed = np.zeros(len(hash_array), dtype=bool)
+    groups = []
+    for i in range(len(hash_array)):
+        if processed[i]:
+            continue
+        processed[i] = True
+        distances = app.hash_distances(hash_array, i, start=i + 1)
+        matches = np.flatnonzero((distances <= threshold) & ~processed[i + 1:]) + i + 1
+        processed[matches] = True
+        groups.append([i] + matches.tolist())
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--pairwise-max', type=int, default=10000,
+                        help="Taille maximale pour laquelle le regroupement par paires est mesuré")
+    args = parser.parse_args()
+
+    print(f"{'images':>8} {'index (s)':>10} {'paires (s)':>11} {'groupes':>8} {'identique':>10}")
+    for size in args.sizes:
+        hash_array = app.hashes_to_array(make_hashes(size, seed=size))
+
+        start = time.perf_counter()
+        indexed_groups = app.group_similar_hashes(hash_array)
+        indexed_time = time.perf_counter() - start
+
+        pairwise_time = '-'
+        same = '-'
+        if size <= args.pairwise_max:
+            start = time.perf_counter()
+            pairwise_groups = group_pairwise(hash_array)
+            pairwise_time = f"{time.perf_counter() - start:.2f}"
+            same = 'oui' if pairwise_groups == indexed_groups else 'NON'
+
+        duplicate_groups = sum(1 for group in indexed_groups if len(group) > 1)
+        print(f"{size:>8} {indexed_time:>10.2f} {pairwise_time:>11} {duplicate_groups:>8} {same:>10}")
+
+
+if __name__ == '__main__':
+    main()
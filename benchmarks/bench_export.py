@@ -0,0 +1,104 @@
+"""
+Benchmark de la construction des archives d'export (iter_zip_stream)
+
+Compare sur un dossier synthétique (JPEG extraits, PNG édités, sauvegardes
+_original) la construction d'origine (zipfile, ZIP_DEFLATED pour toutes les
+entrées, un seul cœur) au moteur d'export : politique de compression par
+extension, séquentiel puis avec un pool de workers. Vérifie que chaque archive
+est valide et restitue exactement les fichiers sources.
+
+Usage :
+    python benchmarks/bench_export.py [--jpegs 200] [--pngs 40] [--workers 1 2 4]
+"""
+import os
+import io
+import sys
+import time
+import random
+import zipfile
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from zip_stream import iter_zip_stream, walk_folder_entries
+
+
+def make_folder(folder, jpegs, pngs, seed=0):
+    """Génère un dossier de document : photos JPEG, captures PNG éditées et leurs originaux"""
+    rng = np.random.default_rng(seed)
+    for i in range(jpegs):
+        # Photo : bruit sur un dégradé, peu compressible une fois en JPEG
+        base = np.linspace(0, 255, 800, dtype=np.float32)[None, :, None]
+        pixels = np.clip(base + rng.normal(0, 40, (600, 800, 3)), 0, 255).astype(np.uint8)
+        Image.fromarray(pixels).save(os.path.join(folder, f"{i:08x}.jpg"), quality=95)
+    for i in range(pngs):
+        # Capture éditée : aplats et annotations, PNG peu compressé par l'éditeur
+        pixels = np.full((1400, 1000, 3), 245, dtype=np.uint8)
+        for _ in range(40):
+            x, y = rng.integers(0, 900), rng.integers(0, 1300)
+            pixels[y:y + rng.integers(5, 100), x:x + rng.integers(5, 100)] = rng.integers(0, 255, 3)
+        pixels[::7] = rng.integers(0, 255, (pixels[::7].shape[0], 1000, 3))
+        image = Image.fromarray(pixels)
+        image.save(os.path.join(folder, f"e{i:07x}.png"), compress_level=1)
+        image.save(os.path.join(folder, f"e{i:07x}_original.png"), compress_level=0)
+
+
+def build_reference(entries):
+    """Construction d'origine : archive zipfile, toutes les entrées compressées (deflate)"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for source_path, arcname in entries:
+            zf.write(source_path, arcname)
+    return buffer.getvalue()
+
+
+def build_engine(entries, workers):
+    """Moteur d'export : archive produite par morceaux"""
+    return b''.join(iter_zip_stream(entries, workers=workers))
+
+
+def check_archive(data, entries):
+    """Vérifie l'archive (CRC) et son contenu par rapport aux fichiers sources"""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        if zf.testzip() is not None:
+            return False
+        for source_path, arcname in entries:
+            with open(source_path, 'rb') as f:
+                if zf.read(arcname) != f.read():
+                    return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jpegs', type=int, default=200)
+    parser.add_argument('--pngs', type=int, default=40)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        make_folder(folder, args.jpegs, args.pngs, seed=args.seed)
+        entries = sorted(walk_folder_entries(folder), key=lambda entry: entry[1])
+        random.Random(args.seed).shuffle(entries)
+        source_bytes = sum(os.path.getsize(source_path) for source_path, _ in entries)
+        print(f"{len(entries)} fichiers, {source_bytes / 1e6:.1f} Mo, {os.cpu_count()} cœurs")
+
+        runs = [('zipfile deflate (origine)', lambda: build_reference(entries))]
+        runs += [(f'moteur, {workers} worker(s)', lambda workers=workers: build_engine(entries, workers))
+                 for workers in args.workers]
+
+        print(f"{'construction':>26} {'durée (s)':>10} {'Mo/s':>8} {'archive (Mo)':>13} {'valide':>7}")
+        for label, build in runs:
+            start = time.perf_counter()
+            data = build()
+            duration = time.perf_counter() - start
+            print(f"{label:>26} {duration:>10.2f} {source_bytes / 1e6 / duration:>8.1f} "
+                  f"{len(data) / 1e6:>13.1f} {'oui' if check_archive(data, entries) else 'NON':>7}")
+
+
+if __name__ == '__main__':
+    main()
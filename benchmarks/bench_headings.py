@@ -0,0 +1,91 @@
+"""
+Benchmark de la détection des titres de section (match_section_heading)
+
+Compare l'alternation précompilée au test des patterns un par un avec re.match
+(implémentation d'origine de detect_sections) sur un corpus de lignes : titres
+numérotés, mots-clés, dates, numéros de page, texte courant. Vérifie que les
+deux implémentations retiennent exactement les mêmes titres.
+
+Usage :
+    python benchmarks/bench_headings.py [--lines 200000] [--seed 0]
+"""
+import os
+import re
+import sys
+import io
+import time
+import random
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+# Fragments assemblés aléatoirement pour construire le corpus
+FRAGMENTS = [
+    '1', '2.3', '4.5.6', '12', '. ', ' ', '  ', '.', '-', ':', '(', ')',
+    'SECTION ', 'section ', 'Chapitre ', 'PARTIE ', 'partie:', 'Page ', 'Table ', 'annexe',
+    'Titre', 'LOGIN', 'user', '2024', '12/03/2024', 'abc', 'é', 'ſection ', '٣', '²',
+    'Introduction générale', 'CONDITIONS PARTICULIERES', 'Texte courant de la page', 'x' * 95,
+]
+
+
+def make_lines(count, seed=0):
+    """Génère un corpus de lignes proches de celles d'un dossier technique"""
+    rng = random.Random(seed)
+    return [
+        ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 7))).strip()
+        for _ in range(count)
+    ]
+
+
+def match_reference(line_text):
+    """Implémentation de référence : patterns testés un par un, regex recompilées à chaque appel"""
+    if (len(line_text) >= 3 and len(line_text) <= 120 and
+        not line_text.isdigit() and
+        not re.match(r'^\d{1,2}/\d{1,2}/\d{4}', line_text) and
+        not line_text.lower().startswith(('page ', 'figure ', 'table ', 'annexe', 'login', 'mot de passe'))):
+
+        for pattern in app.SECTION_PATTERNS:
+            match = re.match(pattern, line_text, re.IGNORECASE)
+            if match:
+                section_number = match.group(1)
+                section_title = match.group(2).strip()
+                if (len(section_title) >= 3 and
+                    not re.match(r'^[\d\s\.\-\)\(\[\]]+$', section_title) and
+                    not section_title.lower().startswith(('login', 'mot de passe', 'password', 'user')) and
+                    len([c for c in section_title if c.isalpha()]) >= 3):
+                    return section_number, section_title, pattern
+                return None
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines, seed=args.seed)
+
+    start = time.perf_counter()
+    reference = [match_reference(line) for line in lines]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [app.match_section_heading(line) for line in lines]
+    compiled_time = time.perf_counter() - start
+
+    mismatches = [line for line, a, b in zip(lines, reference, compiled) if a != b]
+    headings = sum(1 for result in compiled if result)
+
+    print(f"{'lignes':>8} {'titres':>7} {'référence (s)':>14} {'précompilé (s)':>15} {'identique':>10}")
+    print(f"{len(lines):>8} {headings:>7} {reference_time:>14.2f} {compiled_time:>15.2f} "
+          f"{'oui' if not mismatches else 'NON':>10}")
+    for line in mismatches[:10]:
+        print(f"  ≠ {line!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de noms et d'identifiants de documents conservés par entrée
+MAX_DOCUMENT_NAMES = 20
+
+
+class BoilerplateIndex:
+    """
+    Index persistant des images récurrentes (logos, tampons, bandeaux) entre documents
+
+    Chaque entrée est un hash perceptuel observé comme doublon dans un ou plusieurs
+    documents. Une entrée devient active (images ignorées à l'extraction) lorsqu'elle
+    a été vue dans min_documents documents, ou lorsqu'elle est épinglée.
+    """
+
+    def __init__(self, index_path, hash_bits, threshold, min_documents=2, max_entries=1000):
+        """
+        Initialise l'index
+
+        Args:
+            index_path (str): Fichier JSON de l'index
+            hash_bits (int): Taille des hashs perceptuels en bits (HASH_BITS de l'application)
+            threshold (int): Distance de Hamming maximale pour une correspondance
+                             (SIMILARITY_THRESHOLD de l'application)
+            min_documents (int): Nombre de documents à partir duquel une entrée est active
+            max_entries (int): Taille maximale (les entrées non épinglées les plus anciennes sont évincées)
+        """
+        self.index_path = index_path
+        self.hash_bits = hash_bits
+        self.threshold = threshold
+        self.min_documents = min_documents
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        """Charge l'index depuis le disque"""
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return {entry['id']: entry for entry in json.load(f).get('entries', [])}
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Index des images récurrentes illisible ({self.index_path}): {e}")
+            return {}
+
+    def _save(self):
+        """Écrit l'index sur disque (écriture atomique)"""
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': list(self._entries.values())}, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _find(self, hash_value):
+        """Retourne l'entrée la plus proche dans le seuil, ou None"""
+        best_entry = None
+        best_distance = self.threshold + 1
+        for entry in self._entries.values():
+            distance = bin(int(entry['id'], 16) ^ hash_value).count('1')
+            if distance < best_distance:
+                best_entry, best_distance = entry, distance
+        return best_entry
+
+    def is_active(self, entry):
+        """Vérifie si une entrée doit être ignorée à l'extraction"""
+        return entry['pinned'] or entry['document_count'] >= self.min_documents
+
+    def active_hashes(self):
+        """
+        Retourne les hashs des entrées actives
+
+        Returns:
+            list: Hashs (entiers) à ignorer lors de l'extraction
+        """
+        with self._lock:
+            return [int(entry['id'], 16) for entry in self._entries.values() if self.is_active(entry)]
+
+    def active_digest(self):
+        """
+        Empreinte de l'ensemble des entrées actives (change à chaque entrée activée,
+        épinglée, désépinglée ou évincée)
+
+        Returns:
+            str: Empreinte hexadécimale
+        """
+        with self._lock:
+            active_ids = sorted(entry['id'] for entry in self._entries.values() if self.is_active(entry))
+        return hashlib.sha256('\n'.join(active_ids).encode('ascii')).hexdigest()
+
+    def record_document(self, document_id, document_name, duplicate_hashes, skipped_hashes=()):
+        """
+        Enregistre les images récurrentes d'un document traité
+
+        Args:
+            document_id (str): Identifiant du contenu du document (SHA-256 du PDF) : le même
+                               PDF téléversé sous plusieurs noms compte pour un seul document
+            document_name (str): Nom du document (affichage)
+            duplicate_hashes (list): Tuples (hash, occurrences) des groupes de doublons filtrés
+            skipped_hashes (list): Hashs des images ignorées car déjà connues
+        """
+        now = time.time()
+        with self._lock:
+            for hash_value, occurrences in duplicate_hashes:
+                entry = self._find(hash_value)
+                if entry is None:
+                    entry = {
+                        'id': f"{hash_value:0{self.hash_bits // 4}x}",
+                        'occurrences': 0,
+                        'skipped': 0,
+                        'document_count': 0,
+                        'documents': [],
+                        'document_ids': [],
+                        'pinned': False,
+                        'first_seen': now,
+                        'last_seen': now
+                    }
+                    self._entries[entry['id']] = entry
+                entry['occurrences'] += occurrences
+                self._add_document(entry, document_id, document_name, now)
+
+            for hash_value in skipped_hashes:
+                entry = self._find(hash_value)
+                if entry is not None:
+                    entry['skipped'] += 1
+                    self._add_document(entry, document_id, document_name, now)
+
+            self._evict_overflow()
+            self._save()
+
+    def _add_document(self, entry, document_id, document_name, now):
+        """Associe un document à une entrée (compté une fois par contenu de PDF)"""
+        entry['last_seen'] = now
+        document_ids = entry.setdefault('document_ids', [])
+        if document_id not in document_ids:
+            entry['document_count'] += 1
+            entry['document_ids'] = (document_ids + [document_id])[-MAX_DOCUMENT_NAMES:]
+        if document_name not in entry['documents']:
+            entry['documents'] = (entry['documents'] + [document_name])[-MAX_DOCUMENT_NAMES:]
+
+    def _evict_overflow(self):
+        """Évince les entrées non épinglées les moins récemment vues au-delà de max_entries"""
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        candidates = sorted(
+            (entry for entry in self._entries.values() if not entry['pinned']),
+            key=lambda entry: entry['last_seen']
+        )
+        for entry in candidates[:overflow]:
+            del self._entries[entry['id']]
+
+    def list_entries(self):
+        """
+        Retourne toutes les entrées, les plus fréquentes d'abord
+
+        Returns:
+            list: Entrées avec leur statut actif
+        """
+        with self._lock:
+            entries = [dict(entry, active=self.is_active(entry)) for entry in self._entries.values()]
+        return sorted(entries, key=lambda entry: (-entry['occurrences'], entry['id']))
+
+    def pin(self, entry_id, pinned=True):
+        """
+        Épingle (ou désépingle) une entrée : une entrée épinglée est toujours active
+        et n'est jamais évincée automatiquement
+
+        Returns:
+            dict: L'entrée modifiée ou None si elle est inconnue
+        """
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return None
+            entry['pinned'] = pinned
+            self._save()
+            return dict(entry, active=self.is_active(entry))
+
+    def evict(self, entry_id):
+        """
+        Supprime une entrée de l'index
+
+        Returns:
+            bool: True si l'entrée existait
+        """
+        with self._lock:
+            if self._entries.pop(entry_id, None) is None:
+                return False
+            self._save()
+            return True
+
+
+_boilerplate_index = None
+_boilerplate_index_lock = threading.Lock()
+
+def get_boilerplate_index(index_path, hash_bits, threshold, min_documents=2, max_entries=1000):
+    """
+    Retourne l'index des images récurrentes partagé par l'application
+    """
+    global _boilerplate_index
+    with _boilerplate_index_lock:
+        if _boilerplate_index is None:
+            _boilerplate_index = BoilerplateIndex(index_path, hash_bits, threshold,
+                                                  min_documents=min_documents, max_entries=max_entries)
+        return _boilerplate_index
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from zip_stream import iter_zip_stream, READ_CHUNK_SIZE
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version du format des archives (à incrémenter si leur contenu change pour une même configuration)
+ARTIFACT_FORMAT_VERSION = 2
+
+
+class ExportBuild:
+    """
+    Construction d'une archive en cours : le fichier temporaire grossit au fil de
+    l'écriture, les réponses HTTP le suivent (voir follow)
+    """
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.path = None
+        self.error = None
+        self.written = 0
+        self.finished = False
+        self._changed = threading.Condition()
+
+    def advance(self, size):
+        """Signale size octets supplémentaires écrits (et vidés) dans le fichier temporaire"""
+        with self._changed:
+            self.written += size
+            self._changed.notify_all()
+
+    def finish(self):
+        """Termine la construction (succès ou échec) et réveille les lecteurs"""
+        with self._changed:
+            self.finished = True
+            self._changed.notify_all()
+
+    def wait(self):
+        """Attend la fin de la construction"""
+        with self._changed:
+            while not self.finished:
+                self._changed.wait()
+
+    def follow(self):
+        """
+        Restitue l'archive au fil de sa construction
+
+        Le fichier est ouvert avant son renommage (ou rouvert à son emplacement
+        définitif s'il est déjà renommé) : le descripteur reste valable jusqu'à la fin.
+
+        Yields:
+            bytes: Morceaux successifs de l'archive
+
+        Raises:
+            OSError: Si la construction échoue
+        """
+        try:
+            f = open(self.tmp_path, 'rb')
+        except FileNotFoundError:
+            self.wait()
+            if self.error is not None:
+                raise OSError(f"Construction de l'archive échouée: {self.error}")
+            f = open(self.path, 'rb')
+
+        with f:
+            position = 0
+            while True:
+                with self._changed:
+                    while self.written <= position and not self.finished:
+                        self._changed.wait()
+                    if self.error is not None:
+                        raise OSError(f"Construction de l'archive échouée: {self.error}")
+                    available = self.written
+                    if position >= available and self.finished:
+                        return
+                while position < available:
+                    chunk = f.read(min(READ_CHUNK_SIZE, available - position))
+                    if not chunk:
+                        break
+                    position += len(chunk)
+                    yield chunk
+
+
+class ExportArtifactStore:
+    """
+    Archives d'export déjà construites, adressées par leur contenu
+
+    Une archive est identifiée par un digest des entrées demandées (nom dans le ZIP,
+    fichier source, taille et date de modification du fichier) : la même
+    configuration d'export sur des images inchangées désigne la même archive, une
+    image éditée entre-temps en désigne une nouvelle. Les archives sont immuables ;
+    elles sont évincées au-delà de max_age secondes ou, les plus anciennes d'abord,
+    au-delà de max_bytes.
+    """
+
+    def __init__(self, folder, max_bytes=2 * 1024 * 1024 * 1024, max_age=24 * 3600, workers=1):
+        """
+        Initialise le stockage
+
+        Args:
+            folder (str): Dossier des archives
+            max_bytes (int): Taille totale maximale des archives (octets)
+            max_age (int): Durée de conservation d'une archive (secondes)
+            workers (int): Nombre de workers de compression (voir iter_zip_stream)
+        """
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.workers = workers
+        self._lock = threading.Lock()
+        # Constructions en cours : clé -> ExportBuild
+        self._builds = {}
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def make_key(entries):
+        """
+        Construit la clé d'une archive
+
+        Args:
+            entries (list): Tuples (chemin du fichier source, nom dans l'archive)
+
+        Returns:
+            str: Clé hexadécimale
+        """
+        states = []
+        for source_path, arcname in entries:
+            stat = os.stat(source_path)
+            states.append([arcname, os.path.abspath(source_path), stat.st_size, stat.st_mtime_ns])
+        payload = json.dumps({'entries': states, 'version': ARTIFACT_FORMAT_VERSION})
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        """
+        Retourne le fichier d'une archive déjà construite
+
+        Returns:
+            str: Chemin de l'archive ou None si elle n'existe pas (ou plus)
+        """
+        path = os.path.join(self.folder, f"{key}.zip")
+        if not os.path.exists(path):
+            return None
+        if time.time() - os.path.getmtime(path) > self.max_age:
+            return None
+        return path
+
+    def start_build(self, key, entries):
+        """
+        Lance (ou rejoint) la construction d'une archive dans un thread d'arrière-plan
+
+        La construction ne dépend pas de la connexion du client : une archive dont le
+        premier téléchargement est interrompu est tout de même terminée et conservée,
+        le téléchargement peut reprendre sur son URL (Range).
+
+        Args:
+            key (str): Clé de l'archive (voir make_key)
+            entries (list): Tuples (chemin du fichier source, nom dans l'archive)
+
+        Returns:
+            ExportBuild: Construction en cours, ou None si l'archive existe déjà
+        """
+        with self._lock:
+            build = self._builds.get(key)
+            if build is not None:
+                return build
+            if self.get_path(key) is not None:
+                return None
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.zip', dir=self.folder)
+            build = ExportBuild(tmp_path)
+            self._builds[key] = build
+
+        threading.Thread(target=self._run_build, args=(key, build, fd, entries),
+                         name=f"export-build-{key[:12]}", daemon=True).start()
+        return build
+
+    def get_build(self, key):
+        """Construction en cours d'une archive, ou None"""
+        with self._lock:
+            return self._builds.get(key)
+
+    def _run_build(self, key, build, fd, entries):
+        """Écrit l'archive dans son fichier temporaire puis la renomme dans le stockage"""
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter_zip_stream(entries, workers=self.workers):
+                    f.write(chunk)
+                    f.flush()
+                    build.advance(len(chunk))
+            path = os.path.join(self.folder, f"{key}.zip")
+            with self._lock:
+                os.replace(build.tmp_path, path)
+                self._evict(keep=path)
+            build.path = path
+            logger.info(f"📦 Archive d'export construite ({key[:12]}, {os.path.getsize(path) // 1024} Ko)")
+        except Exception as e:
+            build.error = e
+            logger.error(f"❌ Construction de l'archive {key[:12]} échouée: {e}")
+            if os.path.exists(build.tmp_path):
+                os.remove(build.tmp_path)
+        finally:
+            with self._lock:
+                self._builds.pop(key, None)
+            build.finish()
+
+    def _evict(self, keep=None):
+        """Évince les archives expirées puis les plus anciennes au-delà de max_bytes"""
+        now = time.time()
+        archives = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.startswith('.') or not name.endswith('.zip'):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age and path != keep:
+                self._remove(path)
+                continue
+            archives.append((stat.st_mtime, path, stat.st_size))
+
+        archives.sort()
+        total_bytes = sum(size for _, _, size in archives)
+        for _, path, size in archives:
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total_bytes -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            logger.info(f"🗑️ Archive d'export évincée ({os.path.basename(path)[:12]})")
+        except OSError:
+            pass
+
+
+_export_artifact_store = None
+_export_artifact_store_lock = threading.Lock()
+
+def get_export_artifact_store(folder, max_bytes=2 * 1024 * 1024 * 1024, max_age=24 * 3600, workers=1):
+    """
+    Retourne le stockage des archives d'export partagé par l'application
+    """
+    global _export_artifact_store
+    with _export_artifact_store_lock:
+        if _export_artifact_store is None:
+            _export_artifact_store = ExportArtifactStore(folder, max_bytes=max_bytes, max_age=max_age,
+                                                         workers=workers)
+        return _export_artifact_store
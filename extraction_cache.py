@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version du format des entrées (à incrémenter si le résultat d'extraction change de forme)
+CACHE_FORMAT_VERSION = 2
+
+# Taille des blocs lus pour le calcul du SHA-256 des PDF
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_sha256(filepath):
+    """
+    Calcule le SHA-256 d'un fichier par blocs
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Cache disque des résultats d'extraction, adressé par le contenu du PDF
+
+    Une entrée est identifiée par le SHA-256 du PDF et les options d'extraction.
+    Elle contient le résultat (sections, fichiers extraits), une copie des images et
+    le manifeste des pages, ce qui permet de la restituer dans n'importe quel dossier
+    de sortie (le nom du document peut changer entre deux uploads). Les entrées les moins récemment
+    utilisées sont évincées au-delà de max_entries ou de max_bytes.
+    """
+
+    def __init__(self, cache_folder, max_entries=50, max_bytes=1024 * 1024 * 1024):
+        """
+        Initialise le cache
+
+        Args:
+            cache_folder (str): Dossier des entrées du cache
+            max_entries (int): Nombre maximal d'entrées
+            max_bytes (int): Taille totale maximale des images en cache (octets)
+        """
+        self.cache_folder = cache_folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_folder, exist_ok=True)
+
+    @staticmethod
+    def make_key(pdf_sha256, options):
+        """
+        Construit la clé d'une entrée
+
+        Args:
+            pdf_sha256 (str): Empreinte du PDF
+            options (dict): Options d'extraction influant sur le résultat
+
+        Returns:
+            str: Clé hexadécimale
+        """
+        payload = json.dumps({'pdf': pdf_sha256, 'options': options, 'version': CACHE_FORMAT_VERSION},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_folder(self, key):
+        return os.path.join(self.cache_folder, key)
+
+    def get(self, key, output_folder, output_callback=None, manifest_path=None):
+        """
+        Restitue une entrée dans le dossier de sortie
+
+        Les images absentes du dossier sont copiées depuis le cache ; une image déjà
+        présente sous le même UID (éventuellement éditée) est conservée.
+
+        Args:
+            key (str): Clé de l'entrée
+            output_folder (str): Dossier de sortie du document
+            output_callback (callable): Appelé avec le chemin de chaque image copiée, avant la copie
+            manifest_path (str): Manifeste des pages du document, remplacé par celui de l'entrée
+                                 (entrée ignorée si elle n'en a pas)
+
+        Returns:
+            dict: Résultat d'extraction (chemins réécrits vers output_folder) ou None
+        """
+        entry_folder = self._entry_folder(key)
+        entry_path = os.path.join(entry_folder, 'entry.json')
+
+        with self._lock:
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+            entry_manifest_path = os.path.join(entry_folder, 'pages.json')
+            if manifest_path and not os.path.exists(entry_manifest_path):
+                return None
+
+            os.makedirs(output_folder, exist_ok=True)
+            try:
+                for file_info in entry['result']['extracted_files']:
+                    target = os.path.join(output_folder, file_info['filename'])
+                    if not os.path.exists(target):
+                        if output_callback:
+                            output_callback(target)
+                        shutil.copyfile(os.path.join(entry_folder, 'files', file_info['filename']), target)
+                    file_info['path'] = target
+                if manifest_path:
+                    tmp_path = f"{manifest_path}.tmp"
+                    shutil.copyfile(entry_manifest_path, tmp_path)
+                    os.replace(tmp_path, manifest_path)
+            except OSError as e:
+                logger.warning(f"⚠️ Entrée de cache {key[:12]} incomplète, ignorée: {e}")
+                shutil.rmtree(entry_folder, ignore_errors=True)
+                return None
+
+            # Marquer l'entrée comme récemment utilisée (LRU)
+            os.utime(entry_path)
+
+        logger.info(f"⚡ Résultat d'extraction servi depuis le cache ({key[:12]})")
+        return entry['result']
+
+    def put(self, key, result, manifest_path=None):
+        """
+        Enregistre un résultat d'extraction, une copie de ses images et de son manifeste
+
+        Args:
+            key (str): Clé de l'entrée
+            result (dict): Résultat de extract_images_from_pdf
+            manifest_path (str): Manifeste des pages écrit par l'extraction
+        """
+        tmp_folder = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_folder)
+        try:
+            files_folder = os.path.join(tmp_folder, 'files')
+            os.makedirs(files_folder)
+            size = 0
+            for file_info in result['extracted_files']:
+                target = os.path.join(files_folder, file_info['filename'])
+                shutil.copyfile(file_info['path'], target)
+                size += os.path.getsize(target)
+            if manifest_path and os.path.exists(manifest_path):
+                shutil.copyfile(manifest_path, os.path.join(tmp_folder, 'pages.json'))
+
+            with open(os.path.join(tmp_folder, 'entry.json'), 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'size': size, 'created_at': time.time(), 'result': result}, f)
+
+            with self._lock:
+                entry_folder = self._entry_folder(key)
+                if os.path.exists(entry_folder):
+                    shutil.rmtree(entry_folder, ignore_errors=True)
+                os.replace(tmp_folder, entry_folder)
+                self._evict()
+        except Exception as e:
+            logger.warning(f"⚠️ Impossible de mettre en cache le résultat ({key[:12]}): {e}")
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+
+    def _evict(self):
+        """Évince les entrées les moins récemment utilisées au-delà des limites"""
+        entries = []
+        for name in os.listdir(self.cache_folder):
+            entry_path = os.path.join(self.cache_folder, name, 'entry.json')
+            if name.startswith('.') or not os.path.exists(entry_path):
+                continue
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    size = json.load(f).get('size', 0)
+                entries.append((os.path.getmtime(entry_path), name, size))
+            except (OSError, ValueError):
+                continue
+
+        entries.sort()
+        total_bytes = sum(size for _, _, size in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, name, size = entries.pop(0)
+            shutil.rmtree(os.path.join(self.cache_folder, name), ignore_errors=True)
+            total_bytes -= size
+            logger.info(f"🗑️ Entrée de cache évincée ({name[:12]})")
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+def get_extraction_cache(cache_folder, max_entries=50, max_bytes=1024 * 1024 * 1024):
+    """
+    Retourne le cache d'extraction partagé par l'application
+    """
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache(cache_folder, max_entries=max_entries, max_bytes=max_bytes)
+        return _extraction_cache
@@ -0,0 +1,330 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Étapes successives d'un job d'extraction
+JOB_STAGES = ('queued', 'sections', 'extraction', 'dedupe', 'save', 'done')
+
+# Durée de conservation des jobs terminés en mémoire (secondes)
+JOB_RETENTION_SECONDS = 3600
+
+# Nombre d'événements de progression conservés par job (flux SSE)
+JOB_EVENT_BUFFER = 1000
+
+
+class JobCancelled(Exception):
+    """Levée dans le thread d'extraction lorsque le job a été annulé"""
+
+
+class ExtractionJob:
+    """
+    État d'un job d'extraction exécuté en arrière-plan
+    """
+
+    def __init__(self, output_folder):
+        """
+        Initialise un job
+
+        Args:
+            output_folder (str): Dossier de sortie des images du job
+        """
+        self.job_id = uuid.uuid4().hex
+        self.output_folder = output_folder
+        self.status = 'queued'  # queued, running, completed, failed, cancelled
+        self.stage = 'queued'
+        self.current = 0
+        self.total = 0
+        self.total_pages = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future = None
+        self.stage_timings = {}
+        self._cancel_event = threading.Event()
+        self._stage_started_at = self.created_at
+
+        # Journal des événements structurés (consommé par le flux SSE)
+        self._events = deque(maxlen=JOB_EVENT_BUFFER)
+        self._event_seq = 0
+        self._events_changed = threading.Condition()
+
+        # Fichiers écrits par le job (seuls fichiers supprimés en cas d'annulation : le dossier
+        # peut recevoir entre-temps des images éditées ou la sortie d'un autre job)
+        self._folder_existed = os.path.isdir(output_folder)
+        self._written_files = set()
+        self._written_files_lock = threading.Lock()
+
+    def record_output(self, file_path):
+        """
+        Callback appelé par le pipeline d'extraction avant l'écriture d'un fichier de sortie
+
+        Args:
+            file_path (str): Fichier créé dans le dossier de sortie
+        """
+        with self._written_files_lock:
+            self._written_files.add(file_path)
+
+    def report_progress(self, stage, current=0, total=0, **details):
+        """
+        Callback de progression appelé par le pipeline d'extraction
+
+        Args:
+            stage (str): Étape en cours (voir JOB_STAGES)
+            current (int): Nombre d'éléments traités (pages ou images selon l'étape)
+            total (int): Nombre total d'éléments de l'étape
+            **details: Compteurs propres à l'étape (images décodées, groupes de doublons...)
+
+        Raises:
+            JobCancelled: Si l'annulation du job a été demandée
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.job_id)
+
+        if stage != self.stage:
+            self._finish_stage()
+
+        self.stage = stage
+        self.current = current
+        self.total = total
+        if stage in ('sections', 'extraction'):
+            self.total_pages = total
+
+        self.publish('progress', stage=stage, current=current, total=total, **details)
+
+    def _finish_stage(self):
+        """Clôture l'étape en cours et publie sa durée et son débit"""
+        now = time.time()
+        if self.stage != 'queued':
+            duration = now - self._stage_started_at
+            timing = {
+                'duration': round(duration, 3),
+                'items': self.current,
+                'throughput': round(self.current / duration, 1) if duration > 0 else None
+            }
+            self.stage_timings[self.stage] = timing
+            logger.info(f"⏱️ Job {self.job_id} - étape {self.stage}: {timing['items']} éléments en {timing['duration']}s")
+            self.publish('stage', stage=self.stage, **timing)
+        self._stage_started_at = now
+
+    def publish(self, event_type, **data):
+        """
+        Ajoute un événement au journal du job et réveille les flux en attente
+
+        Args:
+            event_type (str): Type d'événement ('progress', 'stage' ou 'status')
+            **data: Contenu de l'événement
+        """
+        with self._events_changed:
+            self._event_seq += 1
+            self._events.append({
+                'id': self._event_seq,
+                'event': event_type,
+                'data': dict(data, time=round(time.time() - self.created_at, 3))
+            })
+            self._events_changed.notify_all()
+
+    def finish(self, status):
+        """Termine le job avec le statut donné et publie l'événement final"""
+        if status == 'completed':
+            self._finish_stage()
+            self.stage = 'done'
+            self.current = self.total
+        self.status = status
+        self.finished_at = time.time()
+        self.publish('status', **self.to_dict())
+
+    def wait_for_events(self, after_id=0, timeout=15):
+        """
+        Retourne les événements postérieurs à after_id, en attendant si nécessaire
+
+        Args:
+            after_id (int): Identifiant du dernier événement reçu par le client
+            timeout (float): Attente maximale en secondes
+
+        Returns:
+            list: Événements (peut être vide après expiration du délai)
+        """
+        with self._events_changed:
+            if self._event_seq <= after_id and not self.is_finished():
+                self._events_changed.wait(timeout)
+            return [event for event in self._events if event['id'] > after_id]
+
+    def is_cancel_requested(self):
+        """Vérifie si l'annulation du job a été demandée"""
+        return self._cancel_event.is_set()
+
+    def is_finished(self):
+        """Vérifie si le job est terminé (succès, échec ou annulation)"""
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def cleanup_output(self):
+        """Supprime les fichiers écrits par le job dans son dossier de sortie"""
+        if not os.path.isdir(self.output_folder):
+            return
+
+        with self._written_files_lock:
+            written_files = sorted(self._written_files)
+        for file_path in written_files:
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError as e:
+                logger.warning(f"⚠️ Impossible de supprimer {file_path}: {e}")
+
+        # Supprimer le dossier s'il a été créé par ce job
+        if not self._folder_existed and not os.listdir(self.output_folder):
+            os.rmdir(self.output_folder)
+
+    def to_dict(self):
+        """
+        Retourne l'état du job pour l'API de suivi
+
+        Returns:
+            dict: Statut, étape et progression du job
+        """
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'stage': self.stage,
+            'current': self.current,
+            'total': self.total,
+            'total_pages': self.total_pages,
+            'error': self.error,
+            'stage_timings': dict(self.stage_timings),
+            'elapsed': round((self.finished_at or time.time()) - self.created_at, 2)
+        }
+
+
+class ExtractionJobManager:
+    """
+    Exécute les extractions dans un pool de threads et suit leur état
+    """
+
+    def __init__(self, max_workers=2, retention_seconds=JOB_RETENTION_SECONDS):
+        """
+        Initialise le gestionnaire de jobs
+
+        Args:
+            max_workers (int): Nombre d'extractions exécutées simultanément
+            retention_seconds (int): Durée de conservation des jobs terminés
+        """
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extraction-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, target, output_folder, *args, **kwargs):
+        """
+        Soumet une extraction en arrière-plan
+
+        La fonction cible reçoit un argument progress_callback supplémentaire
+        qui met à jour le job et interrompt le traitement en cas d'annulation,
+        et un argument output_callback appelé pour chaque fichier de sortie écrit
+        (fichiers supprimés en cas d'annulation).
+
+        Args:
+            target (callable): Fonction d'extraction à exécuter
+            output_folder (str): Dossier de sortie (nettoyé en cas d'annulation)
+
+        Returns:
+            ExtractionJob: Le job créé
+        """
+        self._purge_expired()
+
+        job = ExtractionJob(output_folder)
+        kwargs['progress_callback'] = job.report_progress
+        kwargs['output_callback'] = job.record_output
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        job.future = self._executor.submit(self._run, job, target, args, kwargs)
+        logger.info(f"📥 Job {job.job_id} soumis")
+        return job
+
+    def _run(self, job, target, args, kwargs):
+        """Exécute un job et enregistre son résultat"""
+        if job.is_cancel_requested():
+            job.finish('cancelled')
+            return
+
+        job.status = 'running'
+        job.publish('status', **job.to_dict())
+        try:
+            job.result = target(*args, **kwargs)
+            job.finish('completed')
+            logger.info(f"✅ Job {job.job_id} terminé")
+        except JobCancelled:
+            job.cleanup_output()
+            job.finish('cancelled')
+            logger.info(f"🛑 Job {job.job_id} annulé, dossier de sortie nettoyé")
+        except Exception as e:
+            job.error = str(e)
+            job.finish('failed')
+            logger.error(f"❌ Job {job.job_id} échoué: {e}")
+
+    def get(self, job_id):
+        """
+        Retourne un job par son identifiant
+
+        Returns:
+            ExtractionJob: Le job ou None s'il est inconnu
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Demande l'annulation d'un job
+
+        Un job en attente est annulé immédiatement ; un job en cours s'arrête
+        au prochain point de progression puis nettoie son dossier de sortie.
+
+        Returns:
+            ExtractionJob: Le job ou None s'il est inconnu
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return job
+
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Le job n'avait pas démarré
+            job.cleanup_output()
+            job.finish('cancelled')
+
+        return job
+
+    def _purge_expired(self):
+        """Oublie les jobs terminés depuis plus de retention_seconds"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.is_finished() and job.finished_at and now - job.finished_at > self.retention_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager(max_workers=2):
+    """
+    Retourne le gestionnaire de jobs partagé par l'application
+    """
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = ExtractionJobManager(max_workers=max_workers)
+        return _job_manager
@@ -0,0 +1,125 @@
+import os
+import shutil
+import logging
+import tempfile
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StagedImage:
+    """
+    Image extraite en attente d'écriture : bytes en mémoire ou fichier de staging
+    """
+
+    def __init__(self, size, data=None, path=None):
+        """
+        Args:
+            size (int): Taille des bytes JPEG
+            data (bytes): Bytes conservés en mémoire (None si l'image est sur disque)
+            path (str): Fichier de staging (None si l'image est en mémoire)
+        """
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def spilled(self):
+        """Vrai si l'image a été déchargée sur disque"""
+        return self.path is not None
+
+    def read(self):
+        """Retourne les bytes de l'image"""
+        if self.data is not None:
+            return self.data
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def write_to(self, filepath, move=False):
+        """
+        Écrit l'image à son emplacement définitif
+
+        Args:
+            filepath (str): Chemin de destination
+            move (bool): Déplacer le fichier de staging (dernière utilisation) au lieu de le copier
+        """
+        if self.data is not None:
+            with open(filepath, 'wb') as f:
+                f.write(self.data)
+        elif move:
+            os.replace(self.path, filepath)
+            self.path = filepath
+        else:
+            shutil.copyfile(self.path, filepath)
+
+
+class ImageStaging:
+    """
+    Zone de staging des images extraites, bornée en mémoire
+
+    Tant que le budget mémoire n'est pas atteint, les bytes restent en mémoire ;
+    au-delà, chaque image est écrite dans un dossier de staging dès son décodage
+    et seuls sa taille et son emplacement sont conservés.
+    """
+
+    def __init__(self, parent_folder, memory_budget=None):
+        """
+        Args:
+            parent_folder (str): Dossier dans lequel créer le staging (même disque que la sortie)
+            memory_budget (int): Octets d'images gardés en mémoire (None = illimité, 0 = tout sur disque)
+        """
+        self.parent_folder = parent_folder
+        self.memory_budget = memory_budget
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self.spilled_count = 0
+        self._staging_folder = None
+        self._by_xref = {}
+
+    def stage(self, img_data, xref=None):
+        """
+        Enregistre une image décodée
+
+        Une image dont le xref a déjà été enregistré n'est pas stockée une seconde fois.
+
+        Args:
+            img_data (bytes): Bytes JPEG de l'image
+            xref (int): Référence de l'image dans le PDF (optionnelle)
+
+        Returns:
+            StagedImage: L'image enregistrée
+        """
+        if xref and xref in self._by_xref:
+            return self._by_xref[xref]
+
+        size = len(img_data)
+        if self.memory_budget is None or self.memory_bytes + size <= self.memory_budget:
+            staged = StagedImage(size, data=img_data)
+            self.memory_bytes += size
+        else:
+            staged = StagedImage(size, path=self._spill(img_data))
+            self.spilled_bytes += size
+            self.spilled_count += 1
+
+        if xref:
+            self._by_xref[xref] = staged
+        return staged
+
+    def _spill(self, img_data):
+        """Écrit les bytes dans le dossier de staging et retourne le chemin du fichier"""
+        if self._staging_folder is None:
+            self._staging_folder = tempfile.mkdtemp(prefix='.staging-', dir=self.parent_folder)
+            logger.info(f"💾 Budget mémoire atteint, déchargement des images vers {self._staging_folder}")
+
+        fd, path = tempfile.mkstemp(suffix='.jpg', dir=self._staging_folder)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(img_data)
+        return path
+
+    def cleanup(self):
+        """Supprime le dossier de staging et libère les images en mémoire"""
+        if self._staging_folder is not None:
+            shutil.rmtree(self._staging_folder, ignore_errors=True)
+            self._staging_folder = None
+        self._by_xref.clear()
@@ -0,0 +1,156 @@
+import os
+import json
+import logging
+from collections import defaultdict, deque
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version du format du manifeste (à incrémenter si les enregistrements changent de forme)
+MANIFEST_FORMAT_VERSION = 2
+
+
+def load_page_manifest(manifest_path):
+    """
+    Charge le manifeste d'une extraction précédente
+
+    Returns:
+        dict: 'source' (PDF et options de l'extraction) et 'pages' ({'fingerprint',
+        'image_list', 'bboxes', 'headings', 'records'} dans l'ordre du document), ou None
+    """
+    if not manifest_path or not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_FORMAT_VERSION:
+            return None
+        return manifest
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Manifeste des pages illisible ({manifest_path}): {e}")
+        return None
+
+
+def save_page_manifest(manifest_path, pages, source=None):
+    """
+    Enregistre le manifeste (écriture atomique)
+
+    Args:
+        manifest_path (str): Fichier du manifeste
+        pages (list): Pages (voir make_manifest_page) dans l'ordre du document
+        source (dict): PDF source et options de l'extraction
+    """
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_FORMAT_VERSION, 'source': source or {}, 'pages': pages}, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def update_manifest_source(manifest_path, **fields):
+    """
+    Complète le bloc 'source' d'un manifeste existant (écriture atomique)
+
+    Utilisé quand le manifeste est restauré depuis le cache d'extraction : le même
+    PDF a pu être téléversé sous un autre nom de fichier.
+    """
+    manifest = load_page_manifest(manifest_path)
+    if manifest is None:
+        return
+    manifest['source'].update(fields)
+    save_page_manifest(manifest_path, manifest['pages'], source=manifest['source'])
+
+
+def make_image_record(metadata):
+    """
+    Enregistrement d'une image pour le manifeste (sans les bytes)
+
+    Args:
+        metadata (dict): Métadonnées de l'image après sauvegarde ('filename' si un fichier a été écrit)
+    """
+    hash_value = metadata.get('hash')
+    return {
+        'img_index': metadata['img_index'],
+        'xref': metadata.get('xref'),
+        'hash': f"{hash_value:x}" if hash_value is not None else None,
+        'size': metadata.get('size'),
+        'encoding': metadata.get('encoding'),
+        'bbox': metadata.get('bbox'),
+        'filename': metadata.get('filename'),
+        'prefilter': metadata.get('prefilter')
+    }
+
+
+def make_manifest_page(page_scan, records):
+    """
+    Entrée du manifeste pour une page : scan (empreinte, images, emplacements, titres
+    candidats) et enregistrements des images produites
+
+    Args:
+        page_scan (dict): Scan de la page (voir scan_page)
+        records (list): Enregistrements des images de la page (voir make_image_record)
+    """
+    return {
+        'fingerprint': page_scan['fingerprint'],
+        'image_list': page_scan['images'],
+        'bboxes': [[xref, bboxes] for xref, bboxes in page_scan['bboxes'].items()],
+        'headings': page_scan['headings'],
+        'records': sorted(records, key=lambda record: record['img_index'])
+    }
+
+
+def page_scan_from_manifest(page):
+    """
+    Reconstitue le scan d'une page depuis le manifeste (sans relire la page)
+
+    Returns:
+        dict: Scan au format de scan_page
+    """
+    return {
+        'images': [tuple(img) for img in page['image_list']],
+        'bboxes': {xref: [tuple(bbox) for bbox in bboxes] for xref, bboxes in page['bboxes']},
+        'fingerprint': page['fingerprint'],
+        'headings': page['headings']
+    }
+
+
+class ReusablePages:
+    """
+    Pages d'une révision précédente réutilisables d'après leur empreinte
+
+    Les pages sont retrouvées par empreinte et non par numéro : une page inchangée
+    reste réutilisable si des pages ont été insérées ou supprimées avant elle.
+    Chaque page précédente n'est réutilisée qu'une fois.
+    """
+
+    def __init__(self, previous_pages, require_hash=False):
+        """
+        Args:
+            previous_pages (list): Pages du manifeste précédent
+            require_hash (bool): N'accepter que les pages dont chaque image (hors images
+                                 pré-filtrées) a un hash ou un fichier dont le hash peut être
+                                 recalculé (filtrage des doublons actif)
+        """
+        self._by_fingerprint = defaultdict(deque)
+        for page in previous_pages:
+            if require_hash and any(record['hash'] is None and not record['filename']
+                                    and record['encoding'] != 'prefiltered'
+                                    for record in page['records']):
+                continue
+            self._by_fingerprint[page['fingerprint']].append(page['records'])
+
+    def take(self, fingerprint):
+        """
+        Retourne les enregistrements d'images d'une page inchangée
+
+        Returns:
+            list: Enregistrements (hash converti en entier) ou None si la page a changé
+        """
+        candidates = self._by_fingerprint.get(fingerprint)
+        if not candidates:
+            return None
+        return [
+            dict(record, hash=int(record['hash'], 16) if record['hash'] is not None else None,
+                 bbox=tuple(record['bbox']) if record['bbox'] is not None else None)
+            for record in candidates.popleft()
+        ]
@@ -3,6 +3,26 @@
  * Éditeur d'images intégré pour l'annotation de documentation technique
  */
 
+/**
+ * URL versionnée d'une image pleine taille (repli si results.html n'a pas défini imageUrl)
+ */
+function editorImageUrl(documentName, filename) {
+    if (typeof imageUrl === 'function') {
+        return imageUrl(filename);
+    }
+    const version = window.imageVersions && window.imageVersions[filename];
+    return `/image/${documentName}/${filename}` + (version ? `?v=${version}` : '');
+}
+
+/**
+ * URL versionnée d'une miniature, avec repli sur l'image pleine taille
+ */
+function editorThumbnailUrl(documentName, filename) {
+    return typeof thumbnailUrl === 'function'
+        ? thumbnailUrl(filename)
+        : editorImageUrl(documentName, filename);
+}
+
 class ImageEditor {
     constructor() {
         this.canvas = null;
@@ -243,7 +263,7 @@ class ImageEditor {
                 return;
             }
             
-            const imagePath = `/image/${appState.documentName}/${filename}?t=${Date.now()}`;
+            const imagePath = editorImageUrl(appState.documentName, filename);
             
             fabric.Image.fromURL(imagePath, (img) => {
                 if (!img) {
@@ -1248,6 +1268,11 @@ class ImageEditor {
                     logInfo('✅ Image sauvegardée:', result);
                 }
                 
+                // Nouvelle version : les prochains affichages ne reprennent pas l'image en cache
+                if (result.version && window.imageVersions) {
+                    window.imageVersions[result.filename] = result.version;
+                }
+                
                 const action = replaceOriginal ? 'remplacée' : 'créée';
                 this.showSuccess(`Image ${action} avec succès !`);
                 
@@ -1475,8 +1500,7 @@ class ImageEditor {
                 const documentName = (typeof appState !== 'undefined' && appState.documentName) 
                     ? appState.documentName 
                     : this.currentImageData.document_name;
-                const newSrc = `/image/${documentName}/${newFilename}?t=${Date.now()}`;
-                imgElement.src = newSrc;
+                imgElement.src = editorThumbnailUrl(documentName, newFilename);
                 imgElement.alt = newFilename;
                 // Assurer que le double-clic sur l'image utilise le nouveau nom de fichier
                 imgElement.ondblclick = (event) => {
@@ -1710,9 +1734,11 @@ class ImageEditor {
             if (imageCard) {
                 const imgElement = imageCard.querySelector('img');
                 if (imgElement) {
-                    // Forcer le rechargement avec timestamp
-                    const imagePath = imgElement.src.split('?')[0];
-                    imgElement.src = `${imagePath}?t=${Date.now()}`;
+                    // Recharger via la version renvoyée par l'API
+                    if (imageInfo.version && window.imageVersions) {
+                        window.imageVersions[imageInfo.filename] = imageInfo.version;
+                    }
+                    imgElement.src = editorThumbnailUrl(appState.documentName, imageInfo.filename);
                 }
             }
         });
@@ -1814,8 +1840,7 @@ class ImageEditor {
                 // On pourrait forcer le re-rendu de cette carte spécifique si nécessaire
                 const imgElement = alreadyUpdatedCard.querySelector('img');
                 if (imgElement) {
-                    const imagePath = imgElement.src.split('?')[0];
-                    imgElement.src = `${imagePath.replace(originalFilename, newFilename)}?t=${Date.now()}`;
+                    imgElement.src = editorThumbnailUrl(appState.documentName, newFilename);
                 }
                 return true;
             }
@@ -1834,11 +1859,8 @@ class ImageEditor {
             imageCard.setAttribute('data-image-filename', newFilename);
             console.log(`[ImageEditor] updateImageInDOM: data-image-filename mis à jour à ${newFilename}`);
 
-            // 2. Mettre à jour l'image src avec timestamp
-            const oldImageSrc = imgElement.src;
-            const baseSrc = oldImageSrc.substring(0, oldImageSrc.lastIndexOf('/') + 1);
-            const newImageSrc = `${baseSrc}${newFilename}?t=${Date.now()}`;
-            imgElement.src = newImageSrc;
+            // 2. Mettre à jour l'image src avec l'URL versionnée
+            imgElement.src = editorThumbnailUrl(appState.documentName, newFilename);
             imgElement.alt = newFilename;
             // Assurer que le double-clic sur l'image utilise le nouveau nom de fichier
             imgElement.ondblclick = (event) => {
@@ -1848,7 +1870,7 @@ class ImageEditor {
                     console.warn('showImagePreview function not found for dblclick');
                 }
             };
-            console.log(`[ImageEditor] updateImageInDOM: src de l'image et dblclick mis à jour vers ${newImageSrc}`);
+            console.log(`[ImageEditor] updateImageInDOM: src de l'image et dblclick mis à jour vers ${imgElement.src}`);
 
             // 3. Mettre à jour l'attribut onclick de la carte pour la sélection
             imageCard.setAttribute('onclick', `toggleImageSelectionByClick('${newFilename}')`);
@@ -2857,7 +2879,7 @@ class ImageEditor {
         availableImages.forEach((img, index) => {
             modalContent += `
                 <div class="merge-image-item" style="cursor: pointer; border: 2px solid transparent; border-radius: 8px; overflow: hidden; transition: all 0.2s;" data-image-index="${index}">
-                    <img src="/image/${window.appState.documentName}/${img.filename}" style="width: 100%; height: 100px; object-fit: cover;" alt="${img.filename}">
+                    <img src="/thumbnail/${window.appState.documentName}/${img.filename}?w=240" style="width: 100%; height: 100px; object-fit: cover;" alt="${img.filename}">
                     <div style="padding: 5px; font-size: 0.8em; text-align: center; color: white;">
                         <div>${img.filename}</div>
                         <div style="font-size: 0.7em; opacity: 0.7;">${img.sectionName}</div>
@@ -2969,7 +2991,7 @@ class ImageEditor {
             const imageData = this.tempAvailableImages[imageIndex];
             
             if (imageData) {
-                const imagePath = `/image/${window.appState.documentName}/${imageData.filename}`;
+                const imagePath = editorImageUrl(window.appState.documentName, imageData.filename);
                 
                 // Ajouter l'image au canvas avec Fabric.js
                 fabric.Image.fromURL(imagePath, (img) => {
@@ -221,7 +221,7 @@ class AIIndexingModal {
                 <div class="frost-image-grid" style="max-height: 200px; overflow-y: auto;">
                     ${this.selectedImages.map(img => `
                         <div class="frost-image-preview">
-                            <img src="/image/${encodeURIComponent(appState.documentName)}/${encodeURIComponent(img)}" alt="${img}">
+                            <img src="/thumbnail/${encodeURIComponent(appState.documentName)}/${encodeURIComponent(img)}?w=240" alt="${img}">
                             <div class="frost-image-preview-overlay">
                                 ${img.split('/').pop()}
                             </div>
@@ -303,7 +303,7 @@ class AIIndexingModal {
                         <div class="ai-result-item" style="margin-bottom: 1rem;">
                             <div class="ai-result-header" style="display: flex; align-items: center;">
                                 <div class="frost-image-preview" style="width: 80px; height: 80px; flex-shrink: 0; margin-right: 1rem;">
-                                    <img src="/image/${encodeURIComponent(appState.documentName)}/${encodeURIComponent(result.filename)}" 
+                                    <img src="/thumbnail/${encodeURIComponent(appState.documentName)}/${encodeURIComponent(result.filename)}?w=240" 
                                          alt="${result.filename}" 
                                          style="width: 100%; height: 100%; object-fit: cover; border-radius: 4px;"
                                          onerror="console.error('Erreur chargement image:', this.src); this.style.background='#f3f4f6'; this.alt='Image non trouvée';">
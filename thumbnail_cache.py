@@ -0,0 +1,229 @@
+import os
+import logging
+import tempfile
+import threading
+from io import BytesIO
+from contextlib import contextmanager
+
+from PIL import Image
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largeurs proposées : une largeur demandée est arrondie à la largeur supérieure,
+# ce qui borne le nombre de dérivés par image
+THUMBNAIL_WIDTHS = (120, 240, 480, 960)
+
+# Formats de sortie : (format PIL, extension, options d'encodage)
+THUMBNAIL_FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 80, 'optimize': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+# Au-delà de max_bytes, l'éviction ramène le cache à cette fraction de max_bytes : les
+# demandes suivantes ne reparcourent pas tout le cache à chaque nouveau dérivé
+EVICTION_LOW_WATER = 0.9
+
+
+def normalize_thumbnail_width(width):
+    """Arrondit une largeur demandée à la largeur proposée supérieure (la plus grande au-delà)"""
+    for candidate in THUMBNAIL_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def parse_derivative_name(name):
+    """
+    Décompose le nom d'un dérivé « {uid}-{largeur}-{version}.{extension} »
+
+    L'UID peut lui-même contenir des tirets : le nom est découpé par la droite.
+
+    Returns:
+        tuple | None: (uid, largeur, version, extension), None si le nom n'est pas celui d'un dérivé
+    """
+    stem, dot, extension = name.rpartition('.')
+    parts = stem.rsplit('-', 2)
+    if not dot or len(parts) != 3:
+        return None
+    uid, width, version = parts
+    if not uid or not width.isdigit() or not version:
+        return None
+    try:
+        int(version, 16)
+    except ValueError:
+        return None
+    return uid, int(width), version, extension
+
+
+def render_thumbnail(source_path, width, image_format):
+    """
+    Produit la miniature d'une image, bornée en largeur (proportions conservées, pas d'agrandissement)
+
+    Les JPEG sont décodés en mode draft (réduction DCT 1/2 à 1/8) : l'image n'est pas
+    décodée en pleine résolution pour une petite miniature.
+
+    Returns:
+        bytes: Image encodée
+    """
+    pil_format, _, options = THUMBNAIL_FORMATS[image_format]
+    with Image.open(source_path) as img:
+        img.draft('RGB', (width, max(1, img.height * width // max(1, img.width))))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.thumbnail((width, img.height), Image.LANCZOS)
+        buffer = BytesIO()
+        img.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Cache disque des miniatures et aperçus des images extraites
+
+    Un dérivé est identifié par le dossier du document, l'UID de l'image, la largeur,
+    le format et la date de modification de l'image source : une image éditée
+    (fichier remplacé) produit un nouveau dérivé, l'ancien est supprimé. Les dérivés
+    les moins récemment servis sont évincés au-delà de max_bytes ; un dérivé en cours
+    d'envoi (voir serve) n'est jamais supprimé.
+    """
+
+    def __init__(self, cache_folder, max_bytes=256 * 1024 * 1024):
+        """
+        Initialise le cache
+
+        Args:
+            cache_folder (str): Dossier des dérivés
+            max_bytes (int): Taille totale maximale des dérivés (octets)
+        """
+        self.cache_folder = os.path.abspath(cache_folder)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Dérivés en cours d'envoi : chemin -> nombre de requêtes
+        self._serving = {}
+        os.makedirs(cache_folder, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._list_derivatives())
+
+    def _list_derivatives(self):
+        """Dérivés présents sur disque : (date de dernière utilisation, chemin, taille)"""
+        derivatives = []
+        for root, dirs, files in os.walk(self.cache_folder):
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                derivatives.append((stat.st_mtime, path, stat.st_size))
+        return derivatives
+
+    @contextmanager
+    def serve(self, folder_name, source_path, width, image_format):
+        """
+        Fournit le dérivé d'une image, généré à la première demande
+
+        Le dérivé est protégé de l'éviction jusqu'à la sortie du bloc : l'appelant
+        l'ouvre (send_file) sans risquer qu'une autre requête le supprime entre-temps.
+
+        Args:
+            folder_name (str): Dossier du document (sous-dossier du cache)
+            source_path (str): Image source
+            width (int): Largeur maximale (voir normalize_thumbnail_width)
+            image_format (str): 'jpeg' ou 'webp'
+
+        Yields:
+            str: Chemin du dérivé
+        """
+        path = self._acquire(folder_name, source_path, width, image_format)
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._serving[path] -= 1
+                if not self._serving[path]:
+                    del self._serving[path]
+
+    def _acquire(self, folder_name, source_path, width, image_format):
+        """Retourne le dérivé d'une image (généré si nécessaire), marqué comme en cours d'envoi"""
+        uid = os.path.splitext(os.path.basename(source_path))[0]
+        _, extension, _ = THUMBNAIL_FORMATS[image_format]
+        source_version = f"{os.stat(source_path).st_mtime_ns:x}"
+        folder = os.path.join(self.cache_folder, folder_name)
+        prefix = f"{uid}-{width}-"
+        path = os.path.join(folder, f"{prefix}{source_version}.{extension}")
+
+        with self._lock:
+            if os.path.exists(path):
+                # Marquer le dérivé comme récemment utilisé (LRU)
+                os.utime(path)
+                self._serving[path] = self._serving.get(path, 0) + 1
+                return path
+
+        data = render_thumbnail(source_path, width, image_format)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=folder)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        with self._lock:
+            if os.path.exists(path):
+                # Généré entre-temps par une autre requête
+                self._total_bytes -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data)
+            self._serving[path] = self._serving.get(path, 0) + 1
+            # Dérivés (toutes largeurs et formats) d'une version précédente de l'image (éditée depuis)
+            for name in os.listdir(folder):
+                parsed = parse_derivative_name(name)
+                if parsed and parsed[0] == uid and parsed[2] != source_version:
+                    self._remove(os.path.join(folder, name))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+        return path
+
+    def _remove(self, path):
+        if path in self._serving:
+            return
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self._total_bytes -= size
+        except OSError:
+            pass
+
+    def _evict(self):
+        """
+        Évince les dérivés les moins récemment utilisés jusqu'à EVICTION_LOW_WATER * max_bytes
+        (hors dérivés en cours d'envoi)
+        """
+        derivatives = sorted(self._list_derivatives())
+        self._total_bytes = sum(size for _, _, size in derivatives)
+        target_bytes = self.max_bytes * EVICTION_LOW_WATER
+        evicted = 0
+        for _, path, _ in derivatives:
+            if self._total_bytes <= target_bytes:
+                break
+            if path in self._serving:
+                continue
+            self._remove(path)
+            evicted += 1
+        if evicted:
+            logger.info(f"🗑️ {evicted} miniatures évincées du cache")
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+def get_thumbnail_cache(cache_folder, max_bytes=256 * 1024 * 1024):
+    """
+    Retourne le cache des miniatures partagé par l'application
+    """
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(cache_folder, max_bytes=max_bytes)
+        return _thumbnail_cache
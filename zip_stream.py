@@ -0,0 +1,288 @@
+import os
+import time
+import zlib
+import struct
+import logging
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration des logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Politique de compression par extension : les formats déjà compressés sont stockés tels
+# quels (les compresser coûterait du CPU pour rien), les autres sont compressés (deflate).
+# Les PNG édités et les sauvegardes _original gagnent encore à être compressés.
+COMPRESSION_POLICY = {
+    '.jpg': zipfile.ZIP_STORED,
+    '.jpeg': zipfile.ZIP_STORED,
+    '.gif': zipfile.ZIP_STORED,
+    '.webp': zipfile.ZIP_STORED,
+    '.zip': zipfile.ZIP_STORED,
+    '.png': zipfile.ZIP_DEFLATED,
+}
+DEFAULT_COMPRESSION = zipfile.ZIP_DEFLATED
+
+# Taille des blocs lus dans les fichiers sources
+READ_CHUNK_SIZE = 256 * 1024
+# Données préparées d'une entrée gardées en mémoire avant débordement sur disque
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+# Entrées préparées à l'avance par worker (borne la mémoire des entrées en attente)
+PENDING_ENTRIES_PER_WORKER = 2
+
+# Limites du format ZIP classique au-delà desquelles les champs ZIP64 sont utilisés
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP32_MAX_ENTRIES = 0xFFFF
+
+
+def get_compress_type(arcname):
+    """Méthode de compression d'une entrée selon son extension (voir COMPRESSION_POLICY)"""
+    return COMPRESSION_POLICY.get(os.path.splitext(arcname)[1].lower(), DEFAULT_COMPRESSION)
+
+
+class PreparedEntry:
+    """
+    Entrée d'archive prête à être écrite : CRC, tailles et données (compressées ou non)
+    """
+
+    def __init__(self, compress_type, crc, file_size, compress_size, data, mtime, mode):
+        """
+        Args:
+            compress_type (int): zipfile.ZIP_STORED ou zipfile.ZIP_DEFLATED
+            crc (int): CRC-32 du contenu d'origine
+            file_size (int): Taille d'origine
+            compress_size (int): Taille des données écrites dans l'archive
+            data (file): Données à écrire, positionnées au début (fichier temporaire des
+                         données compressées, ou fichier source ouvert pour une entrée stockée)
+            mtime (float): Date de modification du fichier source
+            mode (int): Permissions du fichier source
+        """
+        self.compress_type = compress_type
+        self.crc = crc
+        self.file_size = file_size
+        self.compress_size = compress_size
+        self.data = data
+        self.mtime = mtime
+        self.mode = mode
+
+
+def prepare_entry(source_path, compress_type):
+    """
+    Lit un fichier source et prépare son entrée (exécuté dans un worker)
+
+    Entrée compressée : le fichier n'est lu qu'une fois (CRC et compression deflate
+    brute), le résultat est gardé dans un fichier temporaire en mémoire (sur disque
+    au-delà de SPOOL_MAX_MEMORY). zlib libère le GIL : les workers compressent en
+    parallèle.
+
+    Entrée stockée : le CRC est calculé sur une première lecture, les données sont
+    relues depuis le fichier source lui-même à l'écriture (ni copie mémoire ni copie
+    disque). Le fichier reste ouvert : un remplacement entre-temps (édition) n'affecte
+    pas l'entrée.
+
+    Returns:
+        PreparedEntry: Entrée prête à être écrite
+    """
+    if compress_type == zipfile.ZIP_STORED:
+        source = open(source_path, 'rb')
+        try:
+            stat = os.fstat(source.fileno())
+            crc = 0
+            file_size = 0
+            for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+            source.seek(0)
+            return PreparedEntry(compress_type, crc, file_size, file_size, source, stat.st_mtime, stat.st_mode)
+        except BaseException:
+            source.close()
+            raise
+
+    stat = os.stat(source_path)
+    data = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    try:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        crc = 0
+        file_size = 0
+        with open(source_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                crc = zlib.crc32(chunk, crc)
+                file_size += len(chunk)
+                data.write(compressor.compress(chunk))
+        data.write(compressor.flush())
+
+        compress_size = data.tell()
+        data.seek(0)
+        return PreparedEntry(compress_type, crc, file_size, compress_size, data, stat.st_mtime, stat.st_mode)
+    except BaseException:
+        data.close()
+        raise
+
+
+def iter_prepared_entries(entries, workers=1):
+    """
+    Prépare les entrées dans un pool de workers et les restitue dans l'ordre demandé
+
+    Au plus workers * PENDING_ENTRIES_PER_WORKER entrées sont préparées à l'avance.
+    Les fichiers illisibles (supprimés entre-temps) sont ignorés.
+
+    Yields:
+        tuple: (nom dans l'archive, PreparedEntry)
+    """
+    if workers <= 1:
+        for source_path, arcname in entries:
+            try:
+                yield arcname, prepare_entry(source_path, get_compress_type(arcname))
+            except OSError as e:
+                logger.warning(f"⚠️ Fichier ignoré dans l'archive ({source_path}): {e}")
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def next_prepared():
+        source_path, arcname, future = pending.popleft()
+        try:
+            return arcname, future.result()
+        except OSError as e:
+            logger.warning(f"⚠️ Fichier ignoré dans l'archive ({source_path}): {e}")
+            return arcname, None
+
+    try:
+        for source_path, arcname in entries:
+            pending.append((source_path, arcname,
+                            executor.submit(prepare_entry, source_path, get_compress_type(arcname))))
+            if len(pending) >= workers * PENDING_ENTRIES_PER_WORKER:
+                arcname, prepared = next_prepared()
+                if prepared is not None:
+                    yield arcname, prepared
+        while pending:
+            arcname, prepared = next_prepared()
+            if prepared is not None:
+                yield arcname, prepared
+    finally:
+        # Interruption (client déconnecté) : ne pas préparer les entrées restantes
+        executor.shutdown(wait=True, cancel_futures=True)
+        for _, _, future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                future.result().data.close()
+
+
+def _dos_datetime(mtime):
+    """Date et heure au format MS-DOS des en-têtes ZIP"""
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def iter_zip_stream(entries, workers=1):
+    """
+    Produit une archive ZIP par morceaux, au fil de la préparation des entrées
+
+    Les fichiers sont lus directement à leur emplacement et écrits sous leur nom
+    dans l'archive : ni copie intermédiaire, ni archive complète en mémoire. Les
+    entrées sont compressées dans un pool de workers (voir iter_prepared_entries)
+    puis assemblées dans l'ordre ; CRC et tailles étant connus avant l'écriture,
+    chaque en-tête local est complet (pas de descripteur de données). Les champs
+    ZIP64 sont utilisés au-delà de 4 Go ou de 65535 entrées.
+
+    Args:
+        entries (iterable): Tuples (chemin du fichier source, nom dans l'archive)
+        workers (int): Nombre de workers de compression (1 = compression séquentielle)
+
+    Yields:
+        bytes: Morceaux successifs de l'archive
+    """
+    offset = 0
+    central_directory = []
+
+    for arcname, prepared in iter_prepared_entries(entries, workers):
+        with prepared.data:
+            try:
+                name = arcname.encode('ascii')
+                flags = 0
+            except UnicodeEncodeError:
+                name = arcname.encode('utf-8')
+                flags = 0x800
+            dos_time, dos_date = _dos_datetime(prepared.mtime)
+
+            zip64 = prepared.file_size >= ZIP32_LIMIT or prepared.compress_size >= ZIP32_LIMIT
+            extra = struct.pack('<HHQQ', 1, 16, prepared.file_size, prepared.compress_size) if zip64 else b''
+            version = 45 if zip64 else 20
+            header = struct.pack(
+                '<IHHHHHIIIHH', 0x04034b50, version, flags, prepared.compress_type, dos_time, dos_date,
+                prepared.crc,
+                ZIP32_LIMIT if zip64 else prepared.compress_size,
+                ZIP32_LIMIT if zip64 else prepared.file_size,
+                len(name), len(extra)
+            )
+            yield header + name + extra
+
+            remaining = prepared.compress_size
+            crc = 0
+            while remaining:
+                chunk = prepared.data.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if prepared.compress_type == zipfile.ZIP_STORED:
+                    crc = zlib.crc32(chunk, crc)
+                remaining -= len(chunk)
+                yield chunk
+            # Entrée stockée relue depuis sa source : modifiée sur place depuis le calcul du CRC,
+            # elle rendrait l'archive invalide (interrompre plutôt que la livrer corrompue)
+            if remaining or (prepared.compress_type == zipfile.ZIP_STORED and crc != prepared.crc):
+                raise OSError(f"Fichier modifié pendant la construction de l'archive: {arcname}")
+
+        central_directory.append((name, flags, version, dos_time, dos_date, prepared, offset))
+        offset += len(header) + len(name) + len(extra) + prepared.compress_size
+
+    # Répertoire central
+    directory_offset = offset
+    directory = []
+    for name, flags, version, dos_time, dos_date, prepared, entry_offset in central_directory:
+        zip64_fields = []
+        if prepared.file_size >= ZIP32_LIMIT or prepared.compress_size >= ZIP32_LIMIT:
+            zip64_fields += [prepared.file_size, prepared.compress_size]
+        if entry_offset >= ZIP32_LIMIT:
+            zip64_fields.append(entry_offset)
+        extra = struct.pack(f'<HH{len(zip64_fields)}Q', 1, 8 * len(zip64_fields), *zip64_fields) if zip64_fields else b''
+        sizes_in_extra = len(zip64_fields) >= 2
+        directory.append(struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version, flags, prepared.compress_type,
+            dos_time, dos_date, prepared.crc,
+            ZIP32_LIMIT if sizes_in_extra else prepared.compress_size,
+            ZIP32_LIMIT if sizes_in_extra else prepared.file_size,
+            len(name), len(extra), 0, 0, 0, (prepared.mode & 0xFFFF) << 16,
+            ZIP32_LIMIT if entry_offset >= ZIP32_LIMIT else entry_offset
+        ) + name + extra)
+    directory = b''.join(directory)
+
+    count = len(central_directory)
+    end = b''
+    if count > ZIP32_MAX_ENTRIES or directory_offset >= ZIP32_LIMIT or len(directory) >= ZIP32_LIMIT:
+        zip64_end_offset = directory_offset + len(directory)
+        end += struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count,
+                           len(directory), directory_offset)
+        end += struct.pack('<IIQI', 0x07064b50, 0, zip64_end_offset, 1)
+    end += struct.pack(
+        '<IHHHHIIH', 0x06054b50, 0, 0, min(count, ZIP32_MAX_ENTRIES), min(count, ZIP32_MAX_ENTRIES),
+        min(len(directory), ZIP32_LIMIT), min(directory_offset, ZIP32_LIMIT), 0
+    )
+    yield directory + end
+
+
+def walk_folder_entries(folder_path):
+    """
+    Entrées d'archive pour tous les fichiers d'un dossier (noms relatifs au dossier)
+
+    Yields:
+        tuple: (chemin du fichier, nom dans l'archive)
+    """
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            yield file_path, os.path.relpath(file_path, folder_path)